@@ -39,7 +39,7 @@ Moves = {
     "DR": (0,1,2,3,4,5,42,43,44, 9,10,11,12,13,14,51,52,53, 18,19,20,21,22,23,24,25,26, 33,30,27,34,31,28,35,32,29, 36,37,38,39,40,41,15,16,17, 45,46,47,48,49,50,6,7,8),
 
     # Inverse
-    "FL": (2,5,8,1,4,7,0,3,9, 9,10,11,12,13,14,15,16,17, 18,19,20,21,22,23,45,48,51, 38,41,44,30,31,32,33,34,35, 36,37,26,39,40,25,42,43,24, 29,46,47,28,49,50,27,52,53),
+    "FL": (2,5,8,1,4,7,0,3,6, 9,10,11,12,13,14,15,16,17, 18,19,20,21,22,23,45,48,51, 38,41,44,30,31,32,33,34,35, 36,37,26,39,40,25,42,43,24, 29,46,47,28,49,50,27,52,53),
     "LU": (27,1,2,30,4,5,33,7,8, 9,10,24,12,13,21,15,16,18, 0,19,20,3,22,23,6,25,26, 17,28,29,14,31,32,11,34,35, 38,41,44,37,40,43,36,39,42, 45,46,47,48,49,50,51,52,53),
     "RD": (0,1,20,3,4,23,6,7,26, 35,10,11,32,13,14,29,16,17, 18,19,15,21,22,12,24,25,9, 27,28,2,30,31,5,33,34,8, 36,37,38,39,40,41,42,43,44, 47,50,53,46,49,52,45,48,51),
     "UR": (36,37,38,3,4,5,6,7,8, 45,46,47,12,13,14,15,16,17, 20,23,26,19,22,25,18,21,24, 27,28,29,30,31,32,33,34,35, 9,10,11,39,40,41,42,43,44, 0,1,2,48,49,50,51,52,53),
@@ -95,6 +95,14 @@ def Astar(start):
                 )
     return None, None
 
+def TwoPhase(start, max_length = 21, time_limit = 0.5):
+    # Kociemba two-phase solver from two_phase.py, for full scrambles.
+    # Returns the first solution of at most max_length face turns that is
+    # close to the lower bound, or the best found within time_limit seconds.
+    # Tables are built once.
+    import two_phase
+    return two_phase.solve(start, max_length, time_limit)
+
 def random_scramble(n_moves):
     # Scramble the cube with n random moves
     state = Goal_State
@@ -151,4 +159,13 @@ if __name__ == "__main__":
         print("-" * 30)
         print()
     else:
-        print("No solution found.\n")
\ No newline at end of file
+        print("No solution found.\n")
+
+    # Full scramble with the two-phase solver
+    scrambled_state, scramble_moves = random_scramble(n_moves = 25)
+    print("Scramble moves applied:", scramble_moves)
+    print("\nSolving the cube using the two-phase solver...")
+    solution, runtime = TwoPhase(scrambled_state)
+    print("Moves to solve:", solution)
+    print("Number of moves:", len(solution))
+    print("Runtime: {:.4f} seconds".format(runtime))
\ No newline at end of file
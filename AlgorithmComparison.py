@@ -1,6 +1,15 @@
 import heapq
+import itertools
+import math
+import operator
+import os
 import random
+import sys
+import threading
 import time
+from collections import OrderedDict, deque, namedtuple
+
+import cube_model
 
 # Cube Definition
 # 2x2x2 cube: 6 faces, 24 stickers
@@ -20,31 +29,12 @@ import time
 # [UR] Upper layer Right
 # [DL] Down layer Left
 
-# Length = 24
-Goal_State = (
-    'R','R','R','R',  # Front
-    'O','O','O','O',  # Back
-    'Y','Y','Y','Y',  # Up
-    'W','W','W','W',  # Down
-    'B','B','B','B',  # Left
-    'G','G','G','G'   # Right
-)
-
-# Original: (0,1,2,3, 4,5,6,7, 8,9,10,11, 12,13,14,15, 16,17,18,19, 20,21,22,23)
-Moves = {
-    "FR": (2,0,3,1, 4,5,6,7, 8,9,17,19, 20,22,14,15, 16,12,18,13, 10,21,11,23),
-    "LD": (8,1,10,3, 12,5,14,7, 4,9,6,11, 0,13,2,15, 18,16,19,17, 20,21,22,23),
-    "RU": (0,13,2,15, 4,9,6,11, 8,1,10,3, 12,5,14,7, 16,17,18,19, 22,20,23,21),
-    "UL": (20,21,2,3, 16,17,6,7, 10,8,11,9, 12,13,14,15, 0,1,18,19, 4,5,22,23),
-    "DR": (0,1,18,19, 4,5,22,23, 8,9,10,11, 14,12,15,13, 16,17,6,7, 20,21,2,3),
-
-    # Inverse
-    "FL": (1,3,0,2, 4,5,6,7, 8,9,20,22, 17,19,14,15, 16,10,18,11, 12,21,13,23),
-    "LU": (12,1,14,3, 8,5,10,7, 0,9,2,11, 4,13,6,15, 17,19,16,18, 20,21,22,23),
-    "RD": (0,9,2,11, 4,13,6,15, 8,5,10,7, 12,1,14,3, 16,17,18,19, 21,23,20,22),
-    "UR": (16,17,2,3, 20,21,6,7, 9,11,8,10, 12,13,14,15, 4,5,18,19, 0,1,22,23),
-    "DL": (0,1,22,23, 4,5,18,19, 8,9,10,11, 13,15,12,14, 16,17,2,3, 20,21,6,7)
-}
+# Length = 24, faces Front, Back, Up, Down, Left, Right (R, O, Y, W, B, G).
+# The move permutations are generated from the cube geometry in cube_model
+# (they are the same tables 2x2.py lists by hand).
+Model = cube_model.cube(2)
+Goal_State = Model.Goal_State
+Moves = Model.Moves
 
 # Functions
 def apply_move(state, move):
@@ -56,121 +46,1049 @@ def heuristic(state):
     # Count the number of misplaced stickers
     return sum(1 for i in range(len(state)) if state[i] != Goal_State[i])
 
-inverse_map = {
-    "FR":"FL", "FL":"FR",
-    "LD":"LU", "LU":"LD",
-    "RU":"RD", "RD":"RU",
-    "UL":"UR", "UR":"UL",
-    "DR":"DL", "DL":"DR"
-}
+inverse_map = Model.inverse_map
+
+# Move sequences as single permutations (permutation.py)
+Group = Model.group
+
+# ----- Incremental Heuristics -----
+# A heuristic that is a sum of per-position costs only changes at the
+# positions a move touches (Touched), so a child's value is its parent's
+# plus the change there. Astar and IDAstar call update() for the children
+# whenever the heuristic has one.
+# The delta reads every touched sticker twice (parent and child), so it
+# only beats a full scan when a move touches at most a third of the
+# positions: 4x4 and up, not the 2x2 (12 of 24) or 3x3 (20 of 54), where
+# update() rescans. validate=True always takes the delta, checks it
+# against a full scan and raises AssertionError if they disagree.
+Touched = Model.Touched
+
+class AdditiveHeuristic:
+    def __init__(self, costs, touched = Touched, validate = False):
+        # costs[i] maps the sticker at position i to its cost
+        self.costs = tuple(costs)
+        self.validate = validate
+        self.incremental = 3 * max(map(len, touched.values())) <= len(self.costs)
+        # Per move: a getter for the touched stickers and their cost maps,
+        # so delta() runs as two C-level map/sum passes
+        self._touched = {
+            move: (operator.itemgetter(*positions), tuple(self.costs[i] for i in positions))
+            for move, positions in touched.items()
+        }
+
+    def __call__(self, state):
+        return sum(map(operator.getitem, self.costs, state))
+
+    def delta(self, state, child, move):
+        # h(child) - h(state) for child = apply_move(state, move)
+        stickers, costs = self._touched[move]
+        return sum(map(operator.getitem, costs, stickers(child))) - sum(map(operator.getitem, costs, stickers(state)))
+
+    def update(self, h, state, child, move):
+        # h(child) from h = h(state)
+        if not (self.incremental or self.validate):
+            return self(child)
+        value = h + self.delta(state, child, move)
+        if self.validate:
+            full = self(child)
+            assert value == full, f"incremental {value} != full {full} after {move}"
+        return value
+
+def misplaced_heuristic(goal = Goal_State, touched = Touched, validate = False):
+    # heuristic() as an AdditiveHeuristic: 1 for every sticker not at its goal color
+    colors = set(goal)
+    return AdditiveHeuristic([{c: int(c != g) for c in colors} for g in goal], touched, validate)
+
+Misplaced = misplaced_heuristic()
+
+# ----- Compact Encoding -----
+# A state can also be stored as one int: the permutation of the 8 corner
+# pieces (8! = 40320) times their twists (3^7 = 2187), 88,179,840 codes.
+# Each slot lists its Up/Down sticker first, then the other two clockwise.
+Corner_Slots = (
+    (10,17,0),   # UFL
+    (11,1,20),   # UFR
+    (9,21,4),    # UBR
+    (8,5,16),    # UBL
+    (12,2,19),   # DFL
+    (13,22,3),   # DFR
+    (15,6,23),   # DBR
+    (14,18,7)    # DBL
+)
+
+N_PERM = 40320
+N_TWIST = 2187
+N_STATES = N_PERM * N_TWIST
+
+# Colours of each corner piece, starting from its Up/Down sticker
+Corner_Colors = tuple(tuple(Goal_State[i] for i in slot) for slot in Corner_Slots)
+_corner_lookup = {frozenset(colors): c for c, colors in enumerate(Corner_Colors)}
+
+Move_Index = {move: i for i, move in enumerate(Moves)}
+
+def _perm_rank(perm):
+    # Lexicographic rank of a permutation of range(8)
+    rank = 0
+    for i in range(8):
+        smaller = sum(1 for j in range(i + 1, 8) if perm[j] < perm[i])
+        rank = rank * (8 - i) + smaller
+    return rank
+
+def _perm_unrank(rank):
+    digits = []
+    for base in range(1, 9):
+        rank, d = divmod(rank, base)
+        digits.append(d)
+    pool = list(range(8))
+    return tuple(pool.pop(d) for d in reversed(digits))
+
+def _twist_rank(twist):
+    rank = 0
+    for t in twist[:7]:
+        rank = rank * 3 + t
+    return rank
+
+def _twist_unrank(rank):
+    twist = [0] * 8
+    for i in range(6, -1, -1):
+        rank, twist[i] = divmod(rank, 3)
+    twist[7] = -sum(twist) % 3
+    return tuple(twist)
+
+def encode_state(state):
+    # Sticker tuple -> int code
+    perm = []
+    twist = []
+    for slot in Corner_Slots:
+        colors = [state[i] for i in slot]
+        perm.append(_corner_lookup[frozenset(colors)])
+        twist.append(next(k for k, c in enumerate(colors) if c in ('Y', 'W')))
+    return _perm_rank(perm) * N_TWIST + _twist_rank(twist)
+
+def decode_state(code):
+    # Int code -> sticker tuple
+    p, t = divmod(code, N_TWIST)
+    perm = _perm_unrank(p)
+    twist = _twist_unrank(t)
+    state = [None] * 24
+    for s, slot in enumerate(Corner_Slots):
+        colors = Corner_Colors[perm[s]]
+        for k in range(3):
+            state[slot[(twist[s] + k) % 3]] = colors[k]
+    return tuple(state)
+
+Goal_Code = encode_state(Goal_State)
+
+def corner_moves():
+    # Each move as corner-level action: (source slot, twist change) per slot
+    table = {}
+    for move, mapping in Moves.items():
+        action = []
+        for slot in Corner_Slots:
+            src = next(s for s, other in enumerate(Corner_Slots) if mapping[slot[0]] in other)
+            shift = Corner_Slots[src].index(mapping[slot[0]])
+            # A move must carry a corner's stickers over in the same cyclic order
+            assert all(mapping[slot[k]] == Corner_Slots[src][(shift + k) % 3] for k in range(3))
+            action.append((src, -shift % 3))
+        table[move] = tuple(action)
+    return table
+
+_perm_moves = None
+_twist_moves = None
+_perm_list = None
+_twist_list = None
+_misplaced = None
+
+def build_coordinate_tables():
+    # Move tables over the permutation and twist coordinates.
+    # perm_moves[p][m] and twist_moves[t][m] give the coordinate after move m.
+    actions = [corner_moves()[move] for move in Moves]
+    perms = list(itertools.permutations(range(8)))
+    perm_index = {p: i for i, p in enumerate(perms)}
+    perm_moves = [
+        [perm_index[tuple(p[src] for src, _ in action)] for action in actions]
+        for p in perms
+    ]
+    twists = [_twist_unrank(t) for t in range(N_TWIST)]
+    twist_moves = [
+        [_twist_rank([(tw[src] + d) % 3 for src, d in action]) for action in actions]
+        for tw in twists
+    ]
+    return perm_moves, twist_moves
+
+def load_coordinate_tables(perm_moves = None, twist_moves = None):
+    # Install move tables for the encoded solvers.
+    # Without arguments, load the on-disk cache kept by move_tables.py,
+    # or build them here if numpy (or the cache directory) is unavailable.
+    global _perm_moves, _twist_moves, _perm_list, _twist_list, _misplaced
+    if perm_moves is None or twist_moves is None:
+        try:
+            import move_tables
+            perm_moves, twist_moves = (table.tolist() for table in move_tables.load_move_tables())
+        except (ImportError, OSError):
+            perm_moves, twist_moves = build_coordinate_tables()
+    _perm_list = list(itertools.permutations(range(8)))
+    _twist_list = [_twist_unrank(t) for t in range(N_TWIST)]
+
+    # Misplaced stickers for corner c sitting in slot s with twist o
+    _misplaced = [
+        [
+            [sum(1 for k in range(3) if Corner_Colors[c][k] != Goal_State[slot[(o + k) % 3]]) for o in range(3)]
+            for c in range(8)
+        ]
+        for slot in Corner_Slots
+    ]
+    _perm_moves, _twist_moves = perm_moves, twist_moves
+
+def apply_move_encoded(code, move):
+    # Apply a move to an encoded state
+    if _perm_moves is None:
+        load_coordinate_tables()
+    p, t = divmod(code, N_TWIST)
+    m = Move_Index[move]
+    return _perm_moves[p][m] * N_TWIST + _twist_moves[t][m]
+
+def heuristic_encoded(code):
+    # Misplaced stickers, computed from the corner coordinates
+    if _perm_moves is None:
+        load_coordinate_tables()
+    p, t = divmod(code, N_TWIST)
+    perm = _perm_list[p]
+    twist = _twist_list[t]
+    return sum(_misplaced[s][perm[s]][twist[s]] for s in range(8))
+
+FOUND = object()  # Search result marker for IDAstar
+
+# ----- Move Pruning -----
+# A pruning automaton is a list indexed by node: table[node] holds the
+# (move, next_node) pairs allowed from there. Node 0 is the empty sequence.
+
+def inverse_pruning():
+    # The classic rule: node = last move, never undo it directly
+    nodes = [None] + list(Moves)
+    index = {move: i for i, move in enumerate(nodes)}
+    return [
+        tuple((move, index[move]) for move in Moves if move != inverse_map.get(last))
+        for last in nodes
+    ]
+
+Inverse_Pruning = inverse_pruning()
+
+_canonical_cache = {}
+
+def canonical_pruning(window = 4):
+    # Forbid every sequence containing a run of up to `window` moves that
+    # does the same as a shorter run, or as an earlier run of the same
+    # length (moves ordered as in Moves). This covers FR FR FR (= FL),
+    # FL FL (= FR FR), and commuting opposite faces (only LD RU, not RU LD).
+    # Every position keeps at least one shortest solution that passes.
+    if window in _canonical_cache:
+        return _canonical_cache[window]
+
+    # Shortlex-first sequence for each permutation, runs up to `window` long
+    identity = tuple(range(len(Goal_State)))
+    first = {identity: ()}
+    layer = [((), identity)]
+    for _ in range(window):
+        next_layer = []
+        for seq, perm in layer:
+            for move in Moves:
+                next_perm = apply_move(perm, move)
+                next_seq = seq + (move,)
+                first.setdefault(next_perm, next_seq)
+                next_layer.append((next_seq, next_perm))
+        layer = next_layer
+    canonical = set(first.values())
+
+    # Nodes are the last (window - 1) moves of an accepted sequence
+    nodes = [()]
+    index = {(): 0}
+    table = []
+    for suffix in nodes:
+        allowed = []
+        for move in Moves:
+            run = suffix + (move,)
+            if all(run[i:] in canonical for i in range(len(run))):
+                next_suffix = run[-(window - 1):] if window > 1 else ()
+                if next_suffix not in index:
+                    index[next_suffix] = len(nodes)
+                    nodes.append(next_suffix)
+                allowed.append((move, index[next_suffix]))
+        table.append(tuple(allowed))
+
+    _canonical_cache[window] = table
+    return table
+
+# ----- Open Lists -----
+# Priority queues for best-first search. push(f, g, item) / pop() -> (f, g, item);
+# lower f first, ties broken on g.
+
+class HeapQueue:
+    # heapq with g tie-breaking, then insertion order (never compares items)
+    def __init__(self, prefer_deeper = False):
+        self._heap = []
+        self._sign = -1 if prefer_deeper else 1
+        self._tie = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, f, g, item):
+        heapq.heappush(self._heap, (f, self._sign * g, next(self._tie), item))
+
+    def pop(self):
+        f, g, _, item = heapq.heappop(self._heap)
+        return f, self._sign * g, item
+
+class BucketQueue:
+    # One bucket per integer f, split by g: O(1) amortized push and pop.
+    # f is small here (at most depth + heuristic), so the bucket rows stay
+    # short. The lowest non-empty f is tracked with a cursor that only moves
+    # back when an inconsistent heuristic pushes a smaller f.
+    # Pops in the same order as HeapQueue: smallest g within an f, and
+    # items with equal (f, g) first in, first out, so switching between the
+    # two only changes speed. prefer_deeper=True pops the largest g within
+    # an f instead, which reaches the goal sooner with an exact heuristic
+    # such as a PatternDatabase: Astar(..., open_list=BucketQueue(True)).
+    def __init__(self, prefer_deeper = False):
+        self.prefer_deeper = prefer_deeper
+        self._buckets = []   # _buckets[f][g] -> deque of items
+        self._counts = []    # Items per f
+        self._min_f = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def push(self, f, g, item):
+        buckets = self._buckets
+        while len(buckets) <= f:
+            buckets.append([])
+            self._counts.append(0)
+        row = buckets[f]
+        while len(row) <= g:
+            row.append(deque())
+        row[g].append(item)
+        self._counts[f] += 1
+        self._size += 1
+        if f < self._min_f:
+            self._min_f = f
+
+    def pop(self):
+        if not self._size:
+            raise IndexError("pop from an empty BucketQueue")
+        f = self._min_f
+        counts = self._counts
+        while not counts[f]:
+            f += 1
+        self._min_f = f
+        row = self._buckets[f]
+        order = range(len(row) - 1, -1, -1) if self.prefer_deeper else range(len(row))
+        for g in order:
+            if row[g]:
+                break
+        counts[f] -= 1
+        self._size -= 1
+        return f, g, row[g].popleft()
+
+Open_Lists = {"heap": HeapQueue, "bucket": BucketQueue}
+
+# ----- Transposition Table -----
+# Remembers, for each state, the largest remaining depth it was expanded
+# with. visit(key, remaining) is False when that is at least `remaining`:
+# the earlier expansion already covered everything this one could reach,
+# so depth-first searches skip the revisit. Entries are only ever an
+# optimisation, so a full table may drop any of them. maxsize caps the
+# entries (None = no cap); the policy picks what gets replaced:
+#   "depth" - the entry with the least remaining depth (cheapest to redo),
+#             and a new entry shallower than all stored ones is not kept
+#   "lru"   - the entry visited longest ago
+#   "fifo"  - the entry stored longest ago
+
+class TranspositionTable:
+    def __init__(self, maxsize = 1 << 18, policy = "depth"):
+        if policy not in ("depth", "lru", "fifo"):
+            raise ValueError(f"unknown replacement policy {policy!r}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.hits = 0
+        self.evictions = 0
+        # OrderedDict pops its oldest entry in O(1); a dict slows down as
+        # its deleted front slots pile up
+        self._depths = OrderedDict()
+        self._by_depth = {}   # "depth" policy: remaining -> OrderedDict of keys, oldest first
+
+    def __len__(self):
+        return len(self._depths)
+
+    def clear(self):
+        self._depths.clear()
+        self._by_depth.clear()
+
+    def visit(self, key, remaining):
+        depths = self._depths
+        stored = depths.get(key)
+        if stored is not None:
+            if stored >= remaining:
+                self.hits += 1
+                if self.policy == "lru":
+                    depths.move_to_end(key)
+                return False
+            if self.policy == "depth":
+                self._forget(key, stored)
+        elif self.maxsize is not None and len(depths) >= self.maxsize and not self._evict(remaining):
+            return True
+        depths[key] = remaining
+        if self.policy == "lru":
+            depths.move_to_end(key)
+        elif self.policy == "depth":
+            bucket = self._by_depth.get(remaining)
+            if bucket is None:
+                bucket = self._by_depth[remaining] = OrderedDict()
+            bucket[key] = None
+        return True
+
+    def _evict(self, remaining):
+        # Make room for an entry with `remaining`; False if it should not be stored
+        if not self.maxsize:
+            return False
+        if self.policy != "depth":
+            self._depths.popitem(last=False)
+        else:
+            lowest = min(self._by_depth)
+            if lowest >= remaining:
+                return False
+            key, _ = self._by_depth[lowest].popitem(last=False)
+            if not self._by_depth[lowest]:
+                del self._by_depth[lowest]
+            del self._depths[key]
+        self.evictions += 1
+        return True
+
+    def _forget(self, key, stored):
+        bucket = self._by_depth[stored]
+        del bucket[key]
+        if not bucket:
+            del self._by_depth[stored]
+
+# ----- Search Control -----
+class SearchStopped(Exception):
+    pass
+
+class SearchCancelled(SearchStopped):
+    pass
+
+class SearchLimitExceeded(SearchStopped):
+    # limit is "nodes", "time" or "memory"
+    def __init__(self, limit):
+        super().__init__(f"{limit} limit exceeded")
+        self.limit = limit
+
+def memory_usage():
+    # Resident memory of this process in bytes, or None if it can't be read
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current size here; kilobytes on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+class SearchStats:
+    # Opt-in instrumentation, attached to a SearchControl:
+    #   control = SearchControl(stats=SearchStats())
+    # Solvers only wrap their move, heuristic and frontier functions in
+    # timers when stats is present, so an uninstrumented search pays nothing
+    # beyond its usual `if control` checks.
+    def __init__(self):
+        self.generated = 0        # States produced by applying a move
+        self.expanded = 0         # States whose moves were tried
+        self.duplicates = 0       # Children (or heap pops) already visited
+        self.peak_frontier = 0    # Open list, BFS layer or DFS path length
+        self.peak_visited = 0
+        self.max_depth = 0
+        self.move_time = 0.0
+        self.heuristic_time = 0.0
+        self.frontier_time = 0.0  # Heap pushes/pops in A*, queue ops in BFS
+        self.peak_memory = 0      # Filled in by run_search
+        self.limit = None
 
-def Astar(start):
+    @property
+    def branching(self):
+        # Average children generated per expanded state
+        return self.generated / self.expanded if self.expanded else 0.0
+
+    def expand(self, depth, frontier, visited):
+        self.expanded += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+        if visited > self.peak_visited:
+            self.peak_visited = visited
+
+    def timed(self, fn, field, counted = False):
+        # fn with its run time added to self.<field>; counted also bumps generated
+        clock = time.perf_counter
+        def wrapper(*args):
+            t = clock()
+            result = fn(*args)
+            setattr(self, field, getattr(self, field) + clock() - t)
+            if counted:
+                self.generated += 1
+            return result
+        return wrapper
+
+    def summary(self):
+        return (f"Expanded {self.expanded:,} | Generated {self.generated:,} | Dups {self.duplicates:,}\n"
+                f"Branching {self.branching:.2f} | Max depth {self.max_depth}\n"
+                f"Peak frontier {self.peak_frontier:,} | Peak visited {self.peak_visited:,}\n"
+                f"Time: moves {self.move_time:.4f}s | h {self.heuristic_time:.4f}s | "
+                f"frontier {self.frontier_time:.4f}s")
+
+class SearchControl:
+    # Shared between a running solver and whoever started it (e.g. the GUI).
+    # Solvers call tick() once per expanded node; any thread may call cancel().
+    # Every `interval` nodes the solver checks for cancellation and limits and
+    # calls progress(control), so the per-node cost is one counter update.
+    #
+    # Limits (None = unlimited):
+    #   max_nodes   expanded nodes
+    #   time_limit  seconds of wall-clock time
+    #   max_memory  bytes the process may grow by during the search
+    #
+    # Solvers also leave partial results here: best is (h, moves) for the
+    # closest state a heuristic search has reached, and lower_bound is the
+    # solution length the search has proved necessary so far.
+    #
+    # stats is an optional SearchStats for detailed instrumentation.
+    def __init__(self, progress = None, interval = 2000, max_nodes = None, time_limit = None, max_memory = None,
+                 stats = None):
+        self.progress = progress
+        self.stats = stats
+        self.interval = interval
+        self.max_nodes = max_nodes
+        self.max_memory = max_memory
+        self.nodes = 0
+        self.depth = 0
+        self.lower_bound = 0
+        self.best = (math.inf, None)
+        self.start_time = time.time()
+        self.deadline = None if time_limit is None else self.start_time + time_limit
+        self.base_memory = memory_usage() if max_memory is not None else None
+        self.peak_memory = 0
+        self._next_check = interval if max_nodes is None else min(interval, max_nodes)
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    def tick(self, depth, count = 1):
+        self.nodes += count
+        self.depth = depth
+        if self.nodes >= self._next_check:
+            self._next_check = self.nodes + self.interval
+            if self.max_nodes is not None:
+                self._next_check = min(self._next_check, self.max_nodes)
+            self.check()
+
+    def improve(self, h, moves):
+        # Record a state closer to the goal than any seen so far
+        if h < self.best[0]:
+            self.best = (h, list(moves))
+
+    def check(self):
+        # Raise SearchCancelled / SearchLimitExceeded, else report progress
+        if self._cancel.is_set():
+            raise SearchCancelled()
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            raise SearchLimitExceeded("nodes")
+        if self.deadline is not None and time.time() >= self.deadline:
+            raise SearchLimitExceeded("time")
+        if self.base_memory is not None:
+            grown = memory_usage() - self.base_memory
+            self.peak_memory = max(self.peak_memory, grown)
+            if grown > self.max_memory:
+                raise SearchLimitExceeded("memory")
+        if self.progress:
+            self.progress(self)
+
+# status: "solved", "unsolved" (search space or max_depth exhausted),
+# "budget_exceeded" or "cancelled"
+# partial: best_moves / best_h toward the closest state reached, lower_bound
+# stats: a SearchStats; without instrument=True only expanded, max_depth,
+# peak_memory (RSS growth seen at checks) and limit are filled in
+SearchResult = namedtuple("SearchResult", ["status", "moves", "runtime", "partial", "stats"])
+
+def run_search(start, algorithm = "A*", max_nodes = None, time_limit = None, max_memory = None,
+               control = None, instrument = False, **kwargs):
+    # Run a solver under limits and always return a SearchResult, never raise.
+    # algorithm is a Solvers name or a solver function; extra keyword
+    # arguments go to the solver (e.g. encoded=True, heuristic_fn=pdb).
+    # instrument=True collects the full SearchStats (slower).
+    solver = Solvers[algorithm] if isinstance(algorithm, str) else algorithm
+    if control is None:
+        control = SearchControl(max_nodes=max_nodes, time_limit=time_limit, max_memory=max_memory,
+                                stats=SearchStats() if instrument else None)
+    limit = None
+    try:
+        moves, runtime = solver(start, control=control, **kwargs)
+        status = "unsolved" if moves is None else "solved"
+    except SearchCancelled:
+        moves, status = None, "cancelled"
+    except SearchLimitExceeded as e:
+        moves, status, limit = None, "budget_exceeded", e.limit
+    runtime = control.elapsed() if moves is None else runtime
+
+    best_h, best_moves = control.best
+    partial = {
+        "best_moves": best_moves,
+        "best_h": None if best_moves is None else best_h,
+        "lower_bound": len(moves) if moves is not None else control.lower_bound,
+    }
+    stats = control.stats
+    if stats is None:
+        stats = SearchStats()
+        stats.expanded = control.nodes
+        stats.max_depth = control.depth
+    stats.peak_memory = control.peak_memory
+    stats.limit = limit
+    return SearchResult(status, moves, runtime, partial, stats)
+
+def _search_space(start, encoded):
+    # Start, move function, goal and heuristic for the chosen representation
+    if encoded:
+        if _perm_moves is None:
+            load_coordinate_tables()
+        if not isinstance(start, int):
+            start = encode_state(start)
+        return start, apply_move_encoded, Goal_Code, heuristic_encoded
+    return start, apply_move, Goal_State, Misplaced
+
+def _instrument(control, apply_fn, h):
+    # The control's SearchStats (or None) and timed versions of apply_fn / h
+    stats = control.stats if control else None
+    if stats is None:
+        return None, apply_fn, h
+    if h is not None:
+        h = stats.timed(h, "heuristic_time")
+    return stats, stats.timed(apply_fn, "move_time", counted=True), h
+
+def _child_heuristic(h, timed_h, stats):
+    # fn(h_parent, state, child, move) -> h(child): incremental for an
+    # AdditiveHeuristic, else a full evaluation with timed_h (from _instrument)
+    update = getattr(h, "update", None)
+    if update is None:
+        return lambda h_parent, state, child, move: timed_h(child)
+    if stats:
+        update = stats.timed(update, "heuristic_time")
+    return update
+
+def Astar(start, encoded = False, heuristic_fn = None, pruning = None, control = None, open_list = "heap"):
     # A* search to solve the cube
+    # encoded=True searches over int codes instead of sticker tuples
+    # heuristic_fn replaces the misplaced-sticker count, e.g. a PatternDatabase
+    # pruning is a move automaton such as canonical_pruning()
+    # control is a SearchControl for progress reports and cancellation
+    # open_list is "heap", "bucket" or an open list instance (see Open_Lists)
     start_time = time.time()
-    frontier = []
-    heapq.heappush(frontier, (heuristic(start), 0, start, [], None))  # last_move = None
-    visited = set()
+    start, apply_fn, goal, h = _search_space(start, encoded)
+    if heuristic_fn is not None:
+        h = heuristic_fn
+    raw_h = h
+    stats, apply_fn, h = _instrument(control, apply_fn, h)
+    child_h = _child_heuristic(raw_h, h, stats)
+    frontier = Open_Lists[open_list]() if isinstance(open_list, str) else open_list
+    push, pop = frontier.push, frontier.pop
+    if stats:
+        push, pop = stats.timed(push, "frontier_time"), stats.timed(pop, "frontier_time")
+    table = pruning or Inverse_Pruning
+    # A state reached with a different move history may allow other moves,
+    # so with a custom automaton states are keyed by (state, node)
+    keyed = pruning is not None
+    start_key = (start, 0) if keyed else start  # node 0 = no moves yet
+    # parents[key] = (parent key, move, automaton node, best g so far).
+    # The open list holds only keys; the path is rebuilt at the goal.
+    parents = {start_key: (None, None, 0, 0)}
+    closed = set()
+    push(h(start), 0, start_key)
 
     while frontier:
-        f, g, state, path, last_move = heapq.heappop(frontier)
-
-        if state == Goal_State:
-            return path, time.time() - start_time
+        f, g, key = pop()
 
-        if state in visited:
+        # Lazy deletion: skip entries already expanded or since reached cheaper
+        if key in closed or g > parents[key][3]:
+            if stats:
+                stats.duplicates += 1
             continue
 
-        visited.add(state)
+        state = key[0] if keyed else key
+        if state == goal:
+            return _trace(parents, key), time.time() - start_time
 
-        for move in Moves:
-            # Skips the inverse of last move
-            if last_move and move == inverse_map.get(last_move):
-                continue
+        closed.add(key)
+        if control:
+            control.tick(g)
+            if f - g < control.best[0]:
+                control.improve(f - g, _trace(parents, key))
+            if stats:
+                stats.expand(g, len(frontier), len(parents))
 
-            next_state = apply_move(state, move)
-            if next_state not in visited:
-                heapq.heappush(
-                    frontier,
-                    (g + 1 + heuristic(next_state), g + 1, next_state, path + [move], move)
-                )
+        # Skips moves the automaton rules out (at least the inverse of last move)
+        for move, next_node in table[parents[key][2]]:
+            next_state = apply_fn(state, move)
+            next_key = (next_state, next_node) if keyed else next_state
+            known = parents.get(next_key)
+            if next_key in closed or (known is not None and known[3] <= g + 1):
+                if stats:
+                    stats.duplicates += 1
+                continue
+            parents[next_key] = (key, move, next_node, g + 1)
+            push(g + 1 + child_h(f - g, state, next_state, move), g + 1, next_key)  # f - g = h(state)
     return None, None
 
-from collections import deque
+def _trace(parents, key):
+    # Moves from the start to key, following parent pointers
+    path = []
+    parent, move = parents[key][:2]
+    while parent is not None:
+        path.append(move)
+        key = parent
+        parent, move = parents[key][:2]
+    path.reverse()
+    return path
 
-def BFS(start):
+def BFS(start, encoded = False, pruning = None, vectorized = False, control = None):
+    # vectorized=True runs the numpy layer-at-a-time BFS from vector_search.py
+    if vectorized:
+        import vector_search
+        return vector_search.vectorized_bfs(start, control=control)
     start_time = time.time()
+    start, apply_fn, goal, _ = _search_space(start, encoded)
+    stats, apply_fn, _ = _instrument(control, apply_fn, None)
+    table = pruning or Inverse_Pruning
     queue = deque()
-    queue.append((start, [], None))
+    push, pop = queue.append, queue.popleft
+    if stats:
+        push, pop = stats.timed(push, "frontier_time"), stats.timed(pop, "frontier_time")
+    push((start, [], 0))
     visited = set([start])
 
     while queue:
-        state, path, last_move = queue.popleft()
+        state, path, node = pop()
 
-        if state == Goal_State:
+        if state == goal:
             return path, time.time() - start_time
+        if control:
+            control.tick(len(path))
+            control.lower_bound = len(path)
+            if stats:
+                stats.expand(len(path), len(queue), len(visited))
 
-        for move in Moves:
-            if last_move and move == inverse_map.get(last_move):
-                continue
-
-            next_state = apply_move(state, move)
+        for move, next_node in table[node]:
+            next_state = apply_fn(state, move)
 
             if next_state not in visited:
                 visited.add(next_state)
-                queue.append((next_state, path + [move], move))
+                push((next_state, path + [move], next_node))
+            elif stats:
+                stats.duplicates += 1
 
     return None, None
 
-def depth_limited_dfs(state, path, depth, last_move, visited):
-    if state == Goal_State:
-        return path
+def _expand_layer(layer, seen, other, apply_fn, table, control = None, depth = 0):
+    # Grow one BFS layer; seen maps state -> (parent, move, node).
+    # Returns the next layer and the first state the other side already knows.
+    stats = control.stats if control else None
+    next_layer = []
+    for state in layer:
+        if control:
+            control.tick(depth)
+            if stats:
+                stats.expand(depth, len(layer) + len(next_layer), len(seen) + len(other))
+        node = seen[state][2]
+        for move, next_node in table[node]:
+            next_state = apply_fn(state, move)
+            if next_state in seen:
+                if stats:
+                    stats.duplicates += 1
+                continue
+            seen[next_state] = (state, move, next_node)
+            if next_state in other:
+                return next_layer, next_state
+            next_layer.append(next_state)
+    return next_layer, None
+
+def _stitch(meet, forward, backward):
+    # Start -> meet from the forward parents, then meet -> goal by undoing
+    # the moves the backward search made
+    path = []
+    state = meet
+    while forward[state][0] is not None:
+        state, move, _ = forward[state]
+        path.append(move)
+    path.reverse()
+
+    state = meet
+    while backward[state][0] is not None:
+        state, move, _ = backward[state]
+        path.append(inverse_map[move])
+    return path
+
+def BidirectionalBFS(start, encoded = False, pruning = None, control = None):
+    # BFS from both ends: expand a full layer on whichever side has the
+    # smaller frontier and stop as soon as the two searches touch.
+    # Each side only needs half the solution depth.
+    start_time = time.time()
+    start, apply_fn, goal, _ = _search_space(start, encoded)
+    _, apply_fn, _ = _instrument(control, apply_fn, None)
+    table = pruning or Inverse_Pruning
+    if start == goal:
+        return [], time.time() - start_time
+
+    forward = {start: (None, None, 0)}
+    backward = {goal: (None, None, 0)}
+    forward_layer = [start]
+    backward_layer = [goal]
 
+    depth = 0  # Combined depth of both searches
+    while forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meet = _expand_layer(forward_layer, forward, backward, apply_fn, table, control, depth)
+        else:
+            backward_layer, meet = _expand_layer(backward_layer, backward, forward, apply_fn, table, control, depth)
+        depth += 1
+        if control:
+            control.lower_bound = depth
+        if meet is not None:
+            return _stitch(meet, forward, backward), time.time() - start_time
+
+    return None, None
+
+def depth_limited_dfs(start, depth, apply_fn = apply_move, goal = Goal_State, table = None, control = None,
+                      transpositions = None, keyed = False):
+    # Moves from start to goal in at most `depth` moves, or None.
+    # Iterative: stack[i] holds the moves still to try from states[i], so
+    # the depth is not limited by Python's recursion limit.
+    # transpositions is a TranspositionTable; it replaces the on-path
+    # visited set (a state on the path has more remaining depth, so it is
+    # skipped as well). keyed stores (state, automaton node) for tables
+    # other than Inverse_Pruning, as in Astar.
+    if start == goal:
+        return []
     if depth == 0:
         return None
+    table = table or Inverse_Pruning
+    if transpositions is None:
+        transpositions = TranspositionTable(maxsize=None)
+    stats = control.stats if control else None
+    transpositions.visit((start, 0) if keyed else start, depth)
+    path = []
+    states = [start]
+    stack = [iter(table[0])]
+    if control:
+        control.tick(0)
+        if stats:
+            stats.expand(0, 1, len(transpositions))
+
+    while stack:
+        step = next(stack[-1], None)
+        if step is None:
+            stack.pop()
+            states.pop()
+            if path:
+                path.pop()
+            continue
 
-    for move in Moves:
-        if last_move and move == inverse_map.get(last_move):
+        move, next_node = step
+        next_state = apply_fn(states[-1], move)
+        if next_state == goal:
+            return path + [move]
+        remaining = depth - len(path) - 1
+        if remaining == 0:
+            continue
+        if not transpositions.visit((next_state, next_node) if keyed else next_state, remaining):
+            if stats:
+                stats.duplicates += 1
             continue
 
-        next_state = apply_move(state, move)
-
-        if next_state not in visited:
-            visited.add(next_state)
-            result = depth_limited_dfs(
-                next_state,
-                path + [move],
-                depth - 1,
-                move,
-                visited
-            )
-            if result:
-                return result
-            visited.remove(next_state)
+        path.append(move)
+        states.append(next_state)
+        stack.append(iter(table[next_node]))
+        if control:
+            control.tick(len(path))
+            if stats:
+                stats.expand(len(path), len(stack), len(transpositions))
 
     return None
 
-def IDS(start, max_depth = 10):
+def IDS(start, max_depth = 10, encoded = False, pruning = None, control = None, tt_size = 1 << 18,
+        replacement = "depth"):
+    # Iterative deepening DFS with a transposition table of at most tt_size
+    # entries (see TranspositionTable for the replacement policies). The
+    # table is kept between iterations: a state expanded last iteration
+    # with r moves to go is reached this iteration with r + 1 from its
+    # shallowest position, so any visit with r or fewer is still dominated.
     start_time = time.time()
+    start, apply_fn, goal, _ = _search_space(start, encoded)
+    _, apply_fn, _ = _instrument(control, apply_fn, None)
+    transpositions = TranspositionTable(tt_size, replacement)
 
     for depth in range(max_depth + 1):
-        visited = set([start])
-        result = depth_limited_dfs(start, [], depth, None, visited)
-        if result:
+        result = depth_limited_dfs(start, depth, apply_fn, goal, pruning, control, transpositions,
+                                   keyed=pruning is not None)
+        if result is not None:
             return result, time.time() - start_time
+        if control:
+            control.lower_bound = depth + 1
+
+    return None, None
+
+def IDAstar(start, encoded = False, heuristic_fn = None, max_depth = 14, pruning = None, control = None):
+    # IDA*: depth-first search bounded by f = g + h, raising the bound
+    # to the smallest f that exceeded it after each pass.
+    # A single path list is pushed and popped, so memory grows with depth only.
+    start_time = time.time()
+    start, apply_fn, goal, h = _search_space(start, encoded)
+    if heuristic_fn is not None:
+        h = heuristic_fn
+    raw_h = h
+    stats, apply_fn, h = _instrument(control, apply_fn, h)
+    child_h = _child_heuristic(raw_h, h, stats)
+    table = pruning or Inverse_Pruning
+    path = []
+
+    def search(state, g, bound, node, h_state):
+        f = g + h_state
+        if f > bound:
+            return f
+        if state == goal:
+            return FOUND
+        if g == max_depth:
+            return math.inf
+        if control:
+            control.tick(g)
+            if f - g < control.best[0]:
+                control.improve(f - g, path)
+            if stats:
+                stats.expand(g, g, 0)
+
+        next_bound = math.inf
+        for move, next_node in table[node]:
+            path.append(move)
+            child = apply_fn(state, move)
+            result = search(child, g + 1, bound, next_node, child_h(h_state, state, child, move))
+            if result is FOUND:
+                return FOUND
+            path.pop()
+            next_bound = min(next_bound, result)
+        return next_bound
+
+    h_start = h(start)
+    bound = h_start
+    while bound != math.inf:
+        if control and heuristic_fn is not None:
+            control.lower_bound = bound  # Misplaced stickers overestimate, so no bound
+        bound = search(start, 0, bound, 0, h_start)
+        if bound is FOUND:
+            return path, time.time() - start_time
 
     return None, None
 
+_distance_tables = {}   # table_heuristic directory -> PatternDatabase, or why it failed
+
+def table_heuristic(directory = None, control = None):
+    # The exact distance table from pattern_database.py in directory
+    # (default move_tables.TABLE_DIR), built once if missing like Lookup
+    # does, or None if it cannot be loaded or built here. A failure is
+    # remembered (see table_error) instead of retried on every solve; a
+    # build cancelled through control is not.
+    if directory not in _distance_tables:
+        try:
+            import move_tables
+            import pattern_database
+            table = pattern_database.load_pattern_database(directory or move_tables.TABLE_DIR, control=control)
+        except (ImportError, OSError, ValueError, MemoryError) as e:
+            table = e
+        _distance_tables[directory] = table
+    table = _distance_tables[directory]
+    return None if isinstance(table, Exception) else table
+
+def table_error(directory = None):
+    # Why table_heuristic(directory) returned None, else None
+    error = _distance_tables.get(directory)
+    return error if isinstance(error, Exception) else None
+
+def PatternIDAstar(start, heuristic_fn = None, table_dir = None, control = None, **kwargs):
+    # IDA* with the exact distance table as heuristic, so it returns
+    # optimal solutions. Falls back to the misplaced-sticker count (which
+    # overestimates, so solutions may be longer) if the table is unavailable;
+    # table_error() then says why.
+    if heuristic_fn is None:
+        heuristic_fn = table_heuristic(table_dir, control)
+    return IDAstar(start, heuristic_fn=heuristic_fn, control=control, **kwargs)
+
+def Lookup(start, table = None, control = None):
+    # God's algorithm: walk down a precomputed distance-to-goal table,
+    # taking any move that gets one step closer. Always optimal.
+    # table defaults to the full table from pattern_database.py (built once).
+    start_time = time.time()
+    if table is None:
+        import pattern_database
+        table = pattern_database.load_pattern_database()
+    code, apply_fn, goal, _ = _search_space(start, True)
+    stats, apply_fn, _ = _instrument(control, apply_fn, None)
+
+    path = []
+    dist = table.distance(code)
+    while dist > 0:
+        for move in Moves:
+            next_code = apply_fn(code, move)
+            next_dist = table.distance(next_code)
+            if next_dist < dist:
+                break
+        else:
+            return None, None  # No move goes down: the table does not match Moves
+        code, dist = next_code, next_dist
+        path.append(move)
+        if control:
+            control.tick(len(path))
+            if stats:
+                stats.expand(len(path), 1, 0)
+
+    return path, time.time() - start_time
+
+# Solvers by display name (all return moves, runtime)
+Solvers = {
+    "A*": Astar,
+    "BFS": BFS,
+    "Bi-BFS": BidirectionalBFS,
+    "IDS": IDS,
+    "IDA*": PatternIDAstar,
+    "Lookup": Lookup,
+}
+
 def random_scramble(n_moves):
-    # Scramble the cube with n random moves
-    state = Goal_State
-    moves = []
+    # Scramble the cube with n random moves, applied as one permutation
     move_keys = list(Moves.keys())
+    moves = [random.choice(move_keys) for _ in range(n_moves)]
+    return Group.apply(Goal_State, moves), moves
 
-    for _ in range(n_moves):
-        move = random.choice(move_keys)
-        state = apply_move(state, move)
-        moves.append(move)
-    return state, moves
+def verify_solution(start, moves, goal = Goal_State):
+    # True if a solver's moves really take start to goal
+    return Group.solves(start, moves, goal)
 
 def display_cube(state):
     # Simple Display of The Cube
@@ -212,6 +1130,14 @@ if __name__ == "__main__":
     print("Solving the cube using IDS...")
     ids_solution, ids_time = IDS(scrambled_state, max_depth=10)
 
+    # Solve with bidirectional BFS
+    print("Solving the cube using Bidirectional BFS...")
+    bibfs_solution, bibfs_time = BidirectionalBFS(scrambled_state)
+
+    # Solve with IDA*
+    print("Solving the cube using IDA*...")
+    idastar_solution, idastar_time = PatternIDAstar(scrambled_state)
+
     print("---------- Results ----------")
 
     if astar_solution:
@@ -224,9 +1150,19 @@ if __name__ == "__main__":
     else:
         print("BFS: No solution")
 
+    if bibfs_solution:
+        print(f"Bi-BFS: Moves = {len(bibfs_solution)}, Time = {bibfs_time:.4f}s")
+    else:
+        print("Bi-BFS: No solution")
+
     if ids_solution:
         print(f"IDS: Moves = {len(ids_solution)}, Time = {ids_time:.4f}s")
     else:
         print("IDS: No solution")
 
+    if idastar_solution:
+        print(f"IDA*: Moves = {len(idastar_solution)}, Time = {idastar_time:.4f}s")
+    else:
+        print("IDA*: No solution")
+
     print("-----------------------------\n")
\ No newline at end of file
@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import sys
+import time
+from collections import namedtuple
+
+import AlgorithmComparison as AC
+
+# Batch solving across a process pool
+#   for result in iter_solve_many(states, "IDA*", workers=4, heuristic="table"):
+#       ...
+#   results = solve_many(states, "A*", workers=4, timeout=2.0)
+#
+# Workers memory-map the distance table (heuristic="table", "Lookup" or "IDA*"), so
+# the 44 MB file is shared through the page cache instead of being copied
+# into every process.
+#
+# Each solve runs through AC.run_search, so timeout is a cooperative
+# deadline and max_nodes / max_memory can be passed like solver arguments.
+
+# status: "solved", "unsolved" (solver returned None), "timeout",
+# "budget_exceeded" (node or memory limit) or "error"
+BatchResult = namedtuple("BatchResult", ["index", "moves", "runtime", "status"])
+
+_LIMITS = ("max_nodes", "max_memory")
+
+_worker = {}
+
+
+def _init_worker(algorithm, heuristic, table_dir, kwargs):
+    # Runs once per worker process
+    solver = AC.Solvers[algorithm]
+    kwargs = dict(kwargs)
+    if heuristic == "table" or algorithm in ("Lookup", "IDA*"):
+        # From table_dir, not the default directory IDA* would otherwise use
+        import pattern_database
+        pdb = pattern_database.load_pattern_database(table_dir)
+        kwargs["table" if algorithm == "Lookup" else "heuristic_fn"] = pdb
+    limits = {key: kwargs.pop(key) for key in _LIMITS if key in kwargs}
+    _worker.update(solver=solver, kwargs=kwargs, limits=limits)
+
+
+def _solve_one(job):
+    index, state, timeout = job
+    start_time = time.time()
+    try:
+        result = AC.run_search(state, _worker["solver"], time_limit=timeout, **_worker["limits"],
+                               **_worker["kwargs"])
+    except Exception as e:
+        return BatchResult(index, None, time.time() - start_time, f"error: {e}")
+    status = result.status
+    if result.stats.limit == "time":
+        status = "timeout"
+    return BatchResult(index, result.moves, result.runtime or 0.0, status)
+
+
+def iter_solve_many(states, algorithm = "A*", workers = None, timeout = None, ordered = True,
+                    heuristic = "default", table_dir = None, chunksize = 1, **kwargs):
+    # Yield a BatchResult per state. With ordered=False results stream in
+    # as they complete; result.index says which input they belong to.
+    # Extra keyword arguments go to the solver (e.g. encoded=True), except
+    # max_nodes / max_memory, which become per-item limits like timeout.
+    if algorithm not in AC.Solvers:
+        raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {list(AC.Solvers)}")
+    if table_dir is None:
+        import move_tables
+        table_dir = move_tables.TABLE_DIR
+    if heuristic == "table" or algorithm in ("Lookup", "IDA*"):
+        # Build the shared table once here rather than in every worker
+        # (IDA* uses it as its default heuristic)
+        import pattern_database
+        pattern_database.load_pattern_database(table_dir)
+
+    jobs = ((i, state, timeout) for i, state in enumerate(states))
+    workers = workers or os.cpu_count() or 1
+    init_args = (algorithm, heuristic, table_dir, kwargs)
+
+    if workers == 1:
+        _init_worker(*init_args)
+        for job in jobs:
+            yield _solve_one(job)
+        return
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=init_args) as pool:
+        run = pool.imap if ordered else pool.imap_unordered
+        yield from run(_solve_one, jobs, chunksize)
+
+
+def solve_many(states, algorithm = "A*", workers = None, timeout = None, **kwargs):
+    # List of BatchResult in input order
+    return list(iter_solve_many(states, algorithm, workers, timeout, ordered=True, **kwargs))
+
+
+# Main
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    algorithm = sys.argv[2] if len(sys.argv) > 2 else "Lookup"
+    # Uniformly random positions, generated in one numpy pass
+    import scrambles
+    states = scrambles.as_tuples(scrambles.uniform_states(count, seed=481)[0])
+
+    start_time = time.time()
+    results = solve_many(states, algorithm, timeout=5.0)
+    elapsed = time.time() - start_time
+
+    solved = [r for r in results if r.status == "solved"]
+    print(f"{algorithm}: solved {len(solved)}/{count} in {elapsed:.2f}s")
+    if solved:
+        print(f"Average moves: {sum(len(r.moves) for r in solved) / len(solved):.2f}")
+    for r in results:
+        if r.status != "solved":
+            print(f"  #{r.index}: {r.status}")
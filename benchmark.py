@@ -0,0 +1,274 @@
+import argparse
+import csv
+import hashlib
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import AlgorithmComparison as AC
+
+# Reproducible solver benchmark
+#   python benchmark.py run --json base.json                 # save a baseline
+#   python benchmark.py run --json new.json --baseline base.json
+#   python benchmark.py compare new.json base.json
+#
+# The corpus is a fixed set of seeded scrambles per depth, so two runs
+# (on the same machine) measure the same positions. Every solve goes through
+# AC.run_search with a time and memory limit, so deep BFS/IDS cases come
+# back as "budget_exceeded" instead of hanging or exhausting memory.
+
+DEFAULT_ALGORITHMS = ("A*", "BFS", "IDS")
+CSV_FIELDS = ("algorithm", "depth", "case", "status", "length", "nodes",
+              "time_min", "time_median", "peak_memory")
+
+
+def build_corpus(depths = range(1, 15), per_depth = 5, seed = 481):
+    # [(depth, scramble moves)], independent of the global random state.
+    # A move never directly undoes the previous one.
+    rng = random.Random(seed)
+    move_keys = list(AC.Moves)
+    corpus = []
+    for depth in depths:
+        for _ in range(per_depth):
+            scramble = []
+            while len(scramble) < depth:
+                move = rng.choice(move_keys)
+                if scramble and AC.inverse_map[move] == scramble[-1]:
+                    continue
+                scramble.append(move)
+            corpus.append((depth, scramble))
+    return corpus
+
+
+def corpus_fingerprint(corpus):
+    # Changes if the scrambles or the move definitions change
+    text = json.dumps([corpus, sorted(AC.Moves.items())])
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+def apply_scramble(scramble):
+    return AC.Group.apply(AC.Goal_State, scramble)
+
+
+def _solve(state, algorithm, limits, kwargs):
+    start = time.perf_counter()
+    result = AC.run_search(state, algorithm, **limits, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _record(result, times, peak = None):
+    return {
+        "status": result.status,
+        "length": len(result.moves) if result.moves is not None else None,
+        "nodes": result.stats.expanded,
+        "time_min": min(times),
+        "time_median": statistics.median(times),
+        "peak_memory": peak,
+    }
+
+
+def bench_case(state, algorithm, repeat = 3, warmup = 1, measure_memory = True, limits = None, **kwargs):
+    # Time one position: warmup runs, then `repeat` timed runs, then one
+    # run under tracemalloc for peak memory (tracing slows the solver, so it
+    # is kept out of the timings). A run that hits a limit ends the case at
+    # once, so an over-budget position costs one limit's worth of time.
+    limits = limits or {}
+    for _ in range(warmup):
+        result, elapsed = _solve(state, algorithm, limits, kwargs)
+        if result.status != "solved":
+            return _record(result, [elapsed])
+
+    times = []
+    for _ in range(repeat):
+        result, elapsed = _solve(state, algorithm, limits, kwargs)
+        times.append(elapsed)
+        if result.status != "solved":
+            return _record(result, times)
+
+    peak = None
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            _solve(state, algorithm, limits, kwargs)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return _record(result, times, peak)
+
+
+def run_benchmark(corpus, algorithms = DEFAULT_ALGORITHMS, repeat = 3, warmup = 1, measure_memory = True,
+                  time_limit = 30.0, max_memory = 1 << 30, progress = None):
+    # Every algorithm on every corpus case; returns a JSON-serialisable dict.
+    # Once an algorithm exceeds its limits at some depth, deeper cases for
+    # it are recorded as "skipped" (they would only be slower).
+    limits = {"time_limit": time_limit, "max_memory": max_memory}
+    records = []
+    for algorithm in algorithms:
+        failed_depth = None
+        for case, (depth, scramble) in enumerate(corpus):
+            if failed_depth is not None and depth > failed_depth:
+                record = {"status": "skipped", "length": None, "nodes": None,
+                          "time_min": None, "time_median": None, "peak_memory": None}
+            else:
+                record = bench_case(apply_scramble(scramble), algorithm, repeat, warmup, measure_memory, limits)
+                if record["status"] == "budget_exceeded":
+                    failed_depth = depth
+            record = {"algorithm": algorithm, "depth": depth, "case": case, **record}
+            records.append(record)
+            if progress:
+                progress(record)
+
+    return {
+        "meta": {
+            "corpus": corpus_fingerprint(corpus),
+            "cases": len(corpus),
+            "repeat": repeat,
+            "warmup": warmup,
+            "time_limit": time_limit,
+            "max_memory": max_memory,
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "records": records,
+    }
+
+
+def summarize(results):
+    # {(algorithm, depth): {"solved", "cases", "time", "nodes", "length"}} with mean values
+    groups = {}
+    for r in results["records"]:
+        groups.setdefault((r["algorithm"], r["depth"]), []).append(r)
+    summary = {}
+    for key, records in groups.items():
+        solved = [r for r in records if r["status"] == "solved"]
+        summary[key] = {
+            "solved": len(solved),
+            "cases": len(records),
+            "time": statistics.mean(r["time_median"] for r in solved) if solved else None,
+            "nodes": statistics.mean(r["nodes"] for r in solved) if solved else None,
+            "length": statistics.mean(r["length"] for r in solved) if solved else None,
+        }
+    return summary
+
+
+def compare(results, baseline, threshold = 0.10, min_time = 0.001):
+    # Regressions of results against baseline, as readable strings.
+    # A case regresses if it no longer solves, finds a longer solution,
+    # expands more nodes, or its median time grows by more than `threshold`
+    # (ignoring differences under min_time seconds, which are noise).
+    if results["meta"]["corpus"] != baseline["meta"]["corpus"]:
+        raise ValueError("baseline was recorded on a different corpus or move set")
+    old = {(r["algorithm"], r["case"]): r for r in baseline["records"]}
+    regressions = []
+    for r in results["records"]:
+        b = old.get((r["algorithm"], r["case"]))
+        if b is None or b["status"] != "solved":
+            continue
+        name = f"{r['algorithm']} depth {r['depth']} case {r['case']}"
+        if r["status"] != "solved":
+            regressions.append(f"{name}: {r['status']} (was solved)")
+            continue
+        if r["length"] > b["length"]:
+            regressions.append(f"{name}: solution length {b['length']} -> {r['length']}")
+        if r["nodes"] > b["nodes"]:
+            regressions.append(f"{name}: nodes {b['nodes']:,} -> {r['nodes']:,}")
+        slower = r["time_median"] - b["time_median"]
+        if slower > min_time and r["time_median"] > b["time_median"] * (1 + threshold):
+            regressions.append(f"{name}: time {b['time_median']:.4f}s -> {r['time_median']:.4f}s "
+                               f"(+{slower / b['time_median']:.0%})")
+    return regressions
+
+
+def write_json(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_csv(results, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(results["records"])
+
+
+def print_record(r):
+    if r["status"] == "solved":
+        memory = f"{r['peak_memory'] / 1024:,.0f} KiB" if r["peak_memory"] is not None else "-"
+        print(f"{r['algorithm']:>6} depth {r['depth']:2d} #{r['case']:<3d} moves {r['length']:2d}  "
+              f"{r['time_median']:.4f}s  {r['nodes']:>10,} nodes  {memory}")
+    else:
+        print(f"{r['algorithm']:>6} depth {r['depth']:2d} #{r['case']:<3d} {r['status']}")
+
+
+def print_summary(results):
+    print(f"\n{'Algorithm':>9} {'Depth':>5} {'Solved':>7} {'Time (s)':>10} {'Nodes':>12} {'Moves':>6}")
+    for (algorithm, depth), s in summarize(results).items():
+        if s["solved"]:
+            print(f"{algorithm:>9} {depth:5d} {s['solved']:>3d}/{s['cases']:<3d} {s['time']:10.4f} "
+                  f"{s['nodes']:12,.0f} {s['length']:6.2f}")
+        else:
+            print(f"{algorithm:>9} {depth:5d} {0:>3d}/{s['cases']:<3d} {'-':>10} {'-':>12} {'-':>6}")
+
+
+def _depth_range(text):
+    # "1-14" or "5"
+    low, _, high = text.partition("-")
+    return range(int(low), int(high or low) + 1)
+
+
+# Main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the 2x2 solvers on a seeded scramble corpus")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run the benchmark")
+    run.add_argument("--algorithms", nargs="+", default=list(DEFAULT_ALGORITHMS), choices=list(AC.Solvers))
+    run.add_argument("--depths", type=_depth_range, default=range(1, 15), help="scramble depths, e.g. 1-14")
+    run.add_argument("--per-depth", type=int, default=5, help="scrambles per depth")
+    run.add_argument("--seed", type=int, default=481)
+    run.add_argument("--repeat", type=int, default=3, help="timed runs per case")
+    run.add_argument("--warmup", type=int, default=1, help="untimed runs per case")
+    run.add_argument("--time-limit", type=float, default=30.0, help="seconds per solve")
+    run.add_argument("--max-memory", type=int, default=1024, help="MiB a solve may allocate")
+    run.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    run.add_argument("--json", help="write results as JSON")
+    run.add_argument("--csv", help="write per-case results as CSV")
+    run.add_argument("--baseline", help="JSON results to compare against")
+    run.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, 0.10 = 10%%")
+
+    cmp_parser = sub.add_parser("compare", help="compare two saved JSON results")
+    cmp_parser.add_argument("results")
+    cmp_parser.add_argument("baseline")
+    cmp_parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        corpus = build_corpus(args.depths, args.per_depth, args.seed)
+        results = run_benchmark(corpus, args.algorithms, args.repeat, args.warmup, not args.no_memory,
+                                args.time_limit, args.max_memory << 20, print_record)
+        print_summary(results)
+        if args.json:
+            write_json(results, args.json)
+        if args.csv:
+            write_csv(results, args.csv)
+        baseline = read_json(args.baseline) if args.baseline else None
+    else:
+        results, baseline = read_json(args.results), read_json(args.baseline)
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        print(f"{len(regressions)} regression(s) against baseline")
+        sys.exit(1 if regressions else 0)
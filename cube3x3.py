@@ -0,0 +1,195 @@
+import hashlib
+import random
+
+import cube_model
+
+# Cubie-level model of the 3x3 cube
+# A state is (cp, co, ep, eo):
+#   cp[i] = corner cubie in corner slot i, co[i] = its twist (0-2)
+#   ep[i] = edge cubie in edge slot i,     eo[i] = its flip (0-1)
+# Slots follow the usual two-phase numbering:
+#   corners URF UFL ULB UBR DFR DLF DBL DRB
+#   edges   UR UF UL UB DR DF DL DB FR FL BL BR
+# Twist and flip are measured against the U/D axis, so U, D, R and L
+# quarter turns keep edges unflipped and only F/B quarter turns flip them.
+#
+# The sticker moves come from cube_model, which generates the same tables
+# as the ones typed out in 3x3.py.
+
+Model = cube_model.cube(3)
+Moves = Model.Moves
+Goal_State = Model.Goal_State
+apply_move = Model.apply_move
+inverse_map = Model.inverse_map
+random_scramble = Model.random_scramble
+
+FACE_NORMALS = cube_model.FACE_NORMALS
+FACE_ORDER = cube_model.FACE_ORDER
+
+# Clockwise quarter turn of each face, and its inverse
+Face_Moves = {
+    "F": ("FR", "FL"),
+    "L": ("LD", "LU"),
+    "R": ("RU", "RD"),
+    "U": ("UL", "UR"),
+    "D": ("DR", "DL"),
+}
+
+Corner_Positions = (
+    (1, 1, 1), (-1, 1, 1), (-1, 1, -1), (1, 1, -1),
+    (1, -1, 1), (-1, -1, 1), (-1, -1, -1), (1, -1, -1),
+)
+Edge_Positions = (
+    (1, 1, 0), (0, 1, 1), (-1, 1, 0), (0, 1, -1),
+    (1, -1, 0), (0, -1, 1), (-1, -1, 0), (0, -1, -1),
+    (1, 0, 1), (-1, 0, 1), (-1, 0, -1), (1, 0, -1),
+)
+
+
+def moves_fingerprint():
+    # Short hash of the move tables, so stale table files are never used
+    text = repr([(move, Moves[move]) for move in Moves])
+    return hashlib.sha1(text.encode()).hexdigest()[:10]
+
+
+def sticker_geometry():
+    # (cubie position, face normal) of every sticker, matching the net used
+    # by the GUI: U above F, L/R beside it, B right of R (seen from behind).
+    # cube_model spaces positions by 2; here they are -1, 0, 1
+    return [(tuple(c // 2 for c in position), normal) for position, normal in cube_model.sticker_geometry(3)]
+
+
+def _det(a, b, c):
+    return (a[0] * (b[1] * c[2] - b[2] * c[1]) - a[1] * (b[0] * c[2] - b[2] * c[0])
+            + a[2] * (b[0] * c[1] - b[1] * c[0]))
+
+
+def _facelets():
+    # Sticker indices of each corner / edge slot, reference sticker first:
+    # the U/D sticker for corners (then clockwise), the U/D or else F/B
+    # sticker for edges
+    index = {sticker: i for i, sticker in enumerate(sticker_geometry())}
+
+    def normals(position):
+        return [tuple(p if k == axis else 0 for k in range(3))
+                for axis, p in enumerate(position) if p]
+
+    corners = []
+    for position in Corner_Positions:
+        ud, a, b = sorted(normals(position), key=lambda n: n[1] == 0)
+        if _det(ud, a, b) != -1:
+            a, b = b, a
+        corners.append(tuple(index[(position, n)] for n in (ud, a, b)))
+    edges = []
+    for position in Edge_Positions:
+        ref, other = sorted(normals(position), key=lambda n: (n[1] == 0, n[2] == 0))
+        edges.append((index[(position, ref)], index[(position, other)]))
+    return tuple(corners), tuple(edges)
+
+
+Corner_Facelets, Edge_Facelets = _facelets()
+Corner_Colors = tuple(tuple(Goal_State[i] for i in slot) for slot in Corner_Facelets)
+Edge_Colors = tuple(tuple(Goal_State[i] for i in slot) for slot in Edge_Facelets)
+_corner_lookup = {frozenset(colors): c for c, colors in enumerate(Corner_Colors)}
+_edge_lookup = {frozenset(colors): e for e, colors in enumerate(Edge_Colors)}
+_ud_colors = {Goal_State[9 * FACE_ORDER.index("U") + 4], Goal_State[9 * FACE_ORDER.index("D") + 4]}
+
+Solved = (tuple(range(8)), (0,) * 8, tuple(range(12)), (0,) * 12)
+
+
+def from_stickers(state):
+    # Sticker tuple -> (cp, co, ep, eo); raises ValueError for impossible cubies
+    cp, co, ep, eo = [], [], [], []
+    try:
+        for slot in Corner_Facelets:
+            colors = [state[i] for i in slot]
+            cp.append(_corner_lookup[frozenset(colors)])
+            co.append(next(k for k, color in enumerate(colors) if color in _ud_colors))
+        for slot in Edge_Facelets:
+            colors = [state[i] for i in slot]
+            edge = _edge_lookup[frozenset(colors)]
+            ep.append(edge)
+            eo.append(0 if colors[0] == Edge_Colors[edge][0] else 1)
+    except (KeyError, StopIteration):
+        raise ValueError("state does not describe a 3x3 cube") from None
+    return tuple(cp), tuple(co), tuple(ep), tuple(eo)
+
+
+def to_stickers(cubie):
+    # (cp, co, ep, eo) -> sticker tuple
+    cp, co, ep, eo = cubie
+    state = list(Goal_State)
+    for slot, (c, twist) in enumerate(zip(cp, co)):
+        for k in range(3):
+            state[Corner_Facelets[slot][(k + twist) % 3]] = Corner_Colors[c][k]
+    for slot, (e, flip) in enumerate(zip(ep, eo)):
+        for k in range(2):
+            state[Edge_Facelets[slot][(k + flip) % 2]] = Edge_Colors[e][k]
+    return tuple(state)
+
+
+def multiply(a, b):
+    # State a followed by b (b given as the cubie form of a move sequence)
+    a_cp, a_co, a_ep, a_eo = a
+    b_cp, b_co, b_ep, b_eo = b
+    return (
+        tuple(a_cp[i] for i in b_cp),
+        tuple((a_co[i] + t) % 3 for i, t in zip(b_cp, b_co)),
+        tuple(a_ep[i] for i in b_ep),
+        tuple((a_eo[i] + f) % 2 for i, f in zip(b_ep, b_eo)),
+    )
+
+
+# Cubie form of every move
+Cubie_Moves = {move: from_stickers(apply_move(Goal_State, move)) for move in Moves}
+
+
+def apply_moves(cubie, moves):
+    for move in moves:
+        cubie = multiply(cubie, Cubie_Moves[move])
+    return cubie
+
+
+def is_solvable(cubie):
+    # Twists sum to 0 mod 3, flips to 0 mod 2, and the corner and edge
+    # permutations have equal parity
+    cp, co, ep, eo = cubie
+
+    def parity(perm):
+        return sum(1 for i in range(len(perm)) for j in range(i) if perm[j] > perm[i]) % 2
+
+    return sum(co) % 3 == 0 and sum(eo) % 2 == 0 and parity(cp) == parity(ep)
+
+
+def random_state(rng = random):
+    # Uniformly random solvable cube (every position is reachable with these moves)
+    cp = list(range(8))
+    ep = list(range(12))
+    rng.shuffle(cp)
+    rng.shuffle(ep)
+    co = [rng.randrange(3) for _ in range(7)]
+    eo = [rng.randrange(2) for _ in range(11)]
+    co.append(-sum(co) % 3)
+    eo.append(sum(eo) % 2)
+    cubie = (tuple(cp), tuple(co), tuple(ep), tuple(eo))
+    if not is_solvable(cubie):
+        ep[0], ep[1] = ep[1], ep[0]
+        cubie = (tuple(cp), tuple(co), tuple(ep), tuple(eo))
+    return to_stickers(cubie)
+
+
+def validate(samples = 20):
+    # Cubie moves agree with the sticker moves on random scrambles
+    assert from_stickers(Goal_State) == Solved
+    for _ in range(samples):
+        state, scramble = random_scramble(30)
+        cubie = apply_moves(Solved, scramble)
+        assert to_stickers(cubie) == state and from_stickers(state) == cubie
+        assert is_solvable(cubie)
+    return True
+
+
+# Main
+if __name__ == "__main__":
+    validate()
+    print("Cubie model matches the sticker moves")
@@ -0,0 +1,208 @@
+import random
+
+import permutation
+from permutation import compose
+
+# Generated NxNxN cube model
+#   model = cube(3)
+#   model.Goal_State, model.Moves, model.inverse_map, model.Touched
+#   model.apply_move(state, "FR"), model.apply_moves(states, "FR")  # numpy batch
+#   model.group.apply(state, moves)   # whole sequence at once, see permutation.py
+#
+# Stickers use the same layout as 2x2.py / 3x3.py: the faces in the order
+# Front, Back, Up, Down, Left, Right, N*N stickers each, row by row as seen
+# in the GUI net. Moves use the same names and the same convention
+# (new_state[i] = state[Moves[move][i]]), so for N = 2 and N = 3 the
+# generated tables are exactly the hand-typed ones.
+#
+# Every sticker gets a position on a grid with coordinates
+# -(N-1), -(N-3), ..., N-1 and the normal of its face. A move rotates all
+# stickers in one layer by a quarter turn; the permutation falls out of
+# where each sticker lands. Layers are counted from the turning face:
+# layer 1 is the face itself (named as before, "FR"), inner slices get
+# the layer number in front ("2FR" turns the slice behind the front face).
+# Slices go up to layer N // 2, so an odd cube's middle slice is left out,
+# as 3x3.py leaves it out.
+
+FACE_ORDER = "FBUDLR"
+FACE_COLORS = {"F": "R", "B": "O", "U": "Y", "D": "W", "L": "B", "R": "G"}
+
+# Turning face, normal axis, and where the turn sends the two other axes:
+# (a, b) -> (b, -a) for a clockwise quarter turn seen from the named side
+# of the move (e.g. "FR" moves the top of the front face to the right)
+Turns = {
+    "FR": ("F", (0, 1)),
+    "LD": ("L", (2, 1)),
+    "RU": ("R", (1, 2)),
+    "UL": ("U", (2, 0)),
+    "DR": ("D", (0, 2)),
+}
+Inverse_Names = {"FR": "FL", "LD": "LU", "RU": "RD", "UL": "UR", "DR": "DL"}
+
+FACE_NORMALS = {
+    "F": (0, 0, 1),
+    "B": (0, 0, -1),
+    "U": (0, 1, 0),
+    "D": (0, -1, 0),
+    "L": (-1, 0, 0),
+    "R": (1, 0, 0),
+}
+
+
+def sticker_geometry(n):
+    # (position, normal) of every sticker in state order
+    stickers = []
+    for face in FACE_ORDER:
+        for i in range(n * n):
+            top = n - 1 - 2 * (i // n)
+            left = 2 * (i % n) - (n - 1)
+            edge = n - 1
+            position = {
+                "F": (left, top, edge),
+                "B": (-left, top, -edge),
+                "U": (left, edge, -top),
+                "D": (left, -edge, top),
+                "L": (-edge, top, left),
+                "R": (edge, top, -left),
+            }[face]
+            stickers.append((position, FACE_NORMALS[face]))
+    return stickers
+
+
+def _rotate(vector, axes):
+    a, b = axes
+    v = list(vector)
+    v[a], v[b] = vector[b], -vector[a]
+    return tuple(v)
+
+
+def _layer_move(stickers, index, face, axes, layer, n):
+    # Permutation turning `layer` (1 = the face) of `face`
+    normal = FACE_NORMALS[face]
+    axis = next(k for k in range(3) if normal[k])
+    coordinate = normal[axis] * (n + 1 - 2 * layer)
+    mapping = list(range(len(stickers)))
+    for i, (position, sticker_normal) in enumerate(stickers):
+        if position[axis] == coordinate:
+            target = (_rotate(position, axes), _rotate(sticker_normal, axes))
+            mapping[index[target]] = i
+    return tuple(mapping)
+
+
+class CubeModel:
+    def __init__(self, n, slices = True):
+        # slices=False keeps only the five outer face turns, like 2x2.py and 3x3.py
+        if n < 2:
+            raise ValueError("cube size must be at least 2")
+        self.n = n
+        self.stickers = sticker_geometry(n)
+        self.Goal_State = tuple(FACE_COLORS[face] for face in FACE_ORDER for _ in range(n * n))
+        self.Moves = {}
+        self.inverse_map = {}
+        self.layers = {}
+        index = {sticker: i for i, sticker in enumerate(self.stickers)}
+        layers = range(1, n // 2 + 1) if slices else range(1, 2)
+        # Clockwise moves first, then the inverses, in the order of 2x2.py
+        for inverse in (False, True):
+            for layer in layers:
+                prefix = "" if layer == 1 else str(layer)
+                for name, (face, axes) in Turns.items():
+                    perm = _layer_move(self.stickers, index, face, axes, layer, n)
+                    move, other = prefix + name, prefix + Inverse_Names[name]
+                    if inverse:
+                        move, other = other, move
+                        perm = compose(perm, perm, perm)
+                    self.Moves[move] = perm
+                    self.inverse_map[move] = other
+                    self.layers[move] = (face, layer)
+        # Positions each move changes, for incremental heuristics
+        self.Touched = {move: tuple(i for i, j in enumerate(perm) if i != j) for move, perm in self.Moves.items()}
+        self.group = permutation.MoveGroup(self.Moves)
+        self._arrays = None
+
+    def apply_move(self, state, move):
+        # Apply a move and return the new cube state
+        mapping = self.Moves[move]
+        return tuple(state[i] for i in mapping)
+
+    def heuristic(self, state):
+        # Count the number of misplaced stickers
+        return sum(1 for i in range(len(state)) if state[i] != self.Goal_State[i])
+
+    def index_arrays(self):
+        # {move: numpy index array}, built once; numpy is only needed here
+        if self._arrays is None:
+            import numpy as np
+            self._arrays = {move: np.array(perm, dtype=np.intp) for move, perm in self.Moves.items()}
+        return self._arrays
+
+    def apply_moves(self, states, move):
+        # Move applied to a numpy array of states (any shape ending in stickers)
+        return states[..., self.index_arrays()[move]]
+
+    def random_scramble(self, n_moves, rng = random):
+        # (state, moves) of n_moves random moves
+        keys = list(self.Moves)
+        moves = [rng.choice(keys) for _ in range(n_moves)]
+        return self.group.apply(self.Goal_State, moves), moves
+
+    def validate(self):
+        # Raises ValueError if a generated move is not a proper quarter turn
+        identity = tuple(range(len(self.Goal_State)))
+        for move, perm in self.Moves.items():
+            if sorted(perm) != list(identity):
+                raise ValueError(f"{move} is not a permutation")
+            if compose(perm, self.Moves[self.inverse_map[move]]) != identity:
+                raise ValueError(f"{move} followed by {self.inverse_map[move]} is not the identity")
+            if perm == identity or compose(perm, perm) == identity or compose(perm, perm, perm, perm) != identity:
+                raise ValueError(f"{move} does not have order 4")
+            # A layer turn moves the 4N stickers around its rim, and a face
+            # turn also the face's own stickers except an odd cube's center
+            moved = len(self.Touched[move])
+            expected = 4 * self.n
+            if self.layers[move][1] == 1:
+                expected += self.n * self.n - self.n % 2
+            if moved != expected:
+                raise ValueError(f"{move} moves {moved} stickers, expected {expected}")
+        return True
+
+    def differences(self, moves):
+        # Names of the moves in a hand-typed table that differ from the model
+        return [move for move, perm in moves.items() if tuple(perm) != self.Moves.get(move)]
+
+
+_models = {}
+
+
+def cube(n, slices = True):
+    # Shared, validated model for an NxNxN cube
+    key = (n, slices)
+    if key not in _models:
+        model = CubeModel(n, slices)
+        model.validate()
+        _models[key] = model
+    return _models[key]
+
+
+# Main
+if __name__ == "__main__":
+    import importlib.util
+    import os
+    import time
+
+    # Compare with the hand-typed tables in 2x2.py and 3x3.py
+    here = os.path.dirname(os.path.abspath(__file__))
+    for n, filename in ((2, "2x2.py"), (3, "3x3.py")):
+        spec = importlib.util.spec_from_file_location(f"cube_{n}", os.path.join(here, filename))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        model = cube(n)
+        differ = model.differences(module.Moves)
+        same_goal = model.Goal_State == module.Goal_State
+        print(f"{filename}: {'matches' if not differ and same_goal else 'differs: ' + ', '.join(differ)}")
+
+    for n in range(2, 8):
+        start = time.time()
+        model = cube(n)
+        print(f"{n}x{n}x{n}: {len(model.Goal_State)} stickers, {len(model.Moves)} moves, "
+              f"built and validated in {time.time() - start:.3f}s")
@@ -1,9 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import queue
 import subprocess
 import sys
+import threading
+import time
 
 import AlgorithmComparison as AC
+import solution_cache
 
 
 # ----------------------------
@@ -43,9 +47,15 @@ class CubeGUI(tk.Tk):
         self.solution_moves = []
         self.animating = False
         self.anim_index = 0
+        self.control = None          # SearchControl of the running solve
+        self.loading_table = False   # Solver thread is loading the IDA* distance table
+        self.results = queue.Queue() # Solver thread -> UI
+        self.cache = solution_cache.SolutionCache(maxsize=4096, path=solution_cache.default_path())
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
 
         # UI
         self._build_layout()
+        self._build_net()
         self._draw_cube(self.current_state)
         self._set_status("Ready. Click Scramble.")
 
@@ -93,12 +103,22 @@ class CubeGUI(tk.Tk):
         ttk.Label(algo_box, text="Algorithm:").grid(row=0, column=0, sticky="w")
         self.algo_var = tk.StringVar(value="A*")
         self.algo_combo = ttk.Combobox(algo_box, width=10, textvariable=self.algo_var, state="readonly")
-        self.algo_combo["values"] = ("A*", "BFS", "IDS")
+        self.algo_combo["values"] = ("A*", "BFS", "Bi-BFS", "IDS", "IDA*")
         self.algo_combo.grid(row=0, column=1, sticky="w", padx=(6, 0))
 
         self.solve_btn = ttk.Button(algo_box, text="Run", command=self.solve)
         self.solve_btn.grid(row=0, column=2, sticky="w", padx=(12, 0))
 
+        self.cancel_btn = ttk.Button(algo_box, text="Cancel", command=self.cancel_solve, state="disabled")
+        self.cancel_btn.grid(row=0, column=3, sticky="w", padx=(8, 0))
+
+        self.stats_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(algo_box, text="Collect stats", variable=self.stats_var).grid(
+            row=1, column=0, columnspan=2, sticky="w", pady=(8, 0))
+
+        self.progress_label = ttk.Label(algo_box, text="Nodes: 0 | Depth: 0 | Elapsed: 0.0s")
+        self.progress_label.grid(row=2, column=0, columnspan=4, sticky="w", pady=(8, 0))
+
         # Animation controls
         anim_box = ttk.LabelFrame(right, text="Animation", padding=10)
         anim_box.pack(fill="x", pady=(12, 0))
@@ -111,8 +131,8 @@ class CubeGUI(tk.Tk):
         self.play_btn = ttk.Button(anim_box, text="Play solution", command=self.play_solution)
         self.play_btn.grid(row=0, column=2, sticky="w", padx=(12, 0))
 
-        self.play_btn = ttk.Button(anim_box, text="Play 3D solution", command=self.solve_3d_solver)
-        self.play_btn.grid(row=0, column=3, sticky="w", padx=(12, 0))
+        self.play_3d_btn = ttk.Button(anim_box, text="Play 3D solution", command=self.solve_3d_solver)
+        self.play_3d_btn.grid(row=0, column=3, sticky="w", padx=(12, 0))
 
         """
         self.step_btn = ttk.Button(anim_box, text="Step", command=self.step_once)
@@ -140,9 +160,10 @@ class CubeGUI(tk.Tk):
     # ----------------------------
     # Cube drawing
     # ----------------------------
-    def _draw_face(self, face_vals, x0, y0, size=50, gap=4):
-        # face_vals: length 4, 2x2 order [0,1;2,3]
-        # Draw squares
+    def _draw_face(self, face, x0, y0, size=50, gap=4):
+        # Create the 4 sticker rectangles of a face, 2x2 order [0,1;2,3],
+        # and remember their item IDs by state position
+        start = FACE_IDX[face][0]
         for i in range(4):
             r = i // 2
             c = i % 2
@@ -150,19 +171,13 @@ class CubeGUI(tk.Tk):
             y1 = y0 + r * (size + gap)
             x2 = x1 + size
             y2 = y1 + size
-            color = COLOR_MAP.get(face_vals[i], "#999999")
-            self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="#333333", width=1)
+            self.sticker_items[start + i] = self.canvas.create_rectangle(
+                x1, y1, x2, y2, fill="#999999", outline="#333333", width=1)
 
-    def _draw_cube(self, state):
-        self.canvas.delete("all")
-
-        # Extract faces
-        F = state[FACE_IDX["F"][0]:FACE_IDX["F"][1]]
-        B = state[FACE_IDX["B"][0]:FACE_IDX["B"][1]]
-        U = state[FACE_IDX["U"][0]:FACE_IDX["U"][1]]
-        D = state[FACE_IDX["D"][0]:FACE_IDX["D"][1]]
-        L = state[FACE_IDX["L"][0]:FACE_IDX["L"][1]]
-        R = state[FACE_IDX["R"][0]:FACE_IDX["R"][1]]
+    def _build_net(self):
+        # Draw the net once; later updates only recolor stickers
+        self.sticker_items = [None] * 24
+        self.shown_colors = [None] * 24   # Sticker letter each item shows now
 
         # Net layout (2x2 faces):
         #       U
@@ -183,12 +198,12 @@ class CubeGUI(tk.Tk):
         Ux -= shift; Lx -= shift; Fx -= shift; Rx -= shift; Bx -= shift
 
         # Draw faces
-        self._draw_face(U, Ux, Uy, size=size, gap=gap)
-        self._draw_face(L, Lx, Ly, size=size, gap=gap)
-        self._draw_face(F, Fx, Fy, size=size, gap=gap)
-        self._draw_face(R, Rx, Ry, size=size, gap=gap)
-        self._draw_face(B, Bx, By, size=size, gap=gap)
-        self._draw_face(D, Fx, Fy + 120, size=size, gap=gap)
+        self._draw_face("U", Ux, Uy, size=size, gap=gap)
+        self._draw_face("L", Lx, Ly, size=size, gap=gap)
+        self._draw_face("F", Fx, Fy, size=size, gap=gap)
+        self._draw_face("R", Rx, Ry, size=size, gap=gap)
+        self._draw_face("B", Bx, By, size=size, gap=gap)
+        self._draw_face("D", Fx, Fy + 120, size=size, gap=gap)
 
         # Labels
         self.canvas.create_text(Ux + 42, Uy - 14, text="U", font=("Segoe UI", 16, "bold"))
@@ -198,14 +213,29 @@ class CubeGUI(tk.Tk):
         self.canvas.create_text(Bx + 42, By - 14, text="B", font=("Segoe UI", 16, "bold"))
         self.canvas.create_text(Fx + 42, Fy + 106, text="D", font=("Segoe UI", 16, "bold"))
 
+    def _draw_cube(self, state, positions = None):
+        # Recolor the stickers whose color changed. positions limits the
+        # check, e.g. to AC.Touched[move] after a single move
+        shown = self.shown_colors
+        for i in range(len(state)) if positions is None else positions:
+            if state[i] != shown[i]:
+                shown[i] = state[i]
+                self.canvas.itemconfig(self.sticker_items[i], fill=COLOR_MAP.get(state[i], "#999999"))
+
     # ----------------------------
     # Actions
     # ----------------------------
     def _set_status(self, msg):
         self.status.config(text=msg)
 
-    def _set_moves_output(self, moves, runtime):
-        self.metrics_label.config(text=f"Moves: {len(moves) if moves else 0} | Runtime: {runtime:.4f}s")
+    def _set_moves_output(self, moves, runtime, stats = None, solve_time = None):
+        # solve_time is given for cached results: runtime is then the lookup
+        text = f"Moves: {len(moves) if moves else 0} | Runtime: {runtime:.4f}s"
+        if solve_time is not None:
+            text += f" (cached, search took {solve_time:.4f}s)"
+        if stats:
+            text += "\n" + stats.summary()
+        self.metrics_label.config(text=text)
         self.moves_text.delete("1.0", "end")
         if moves:
             self.moves_text.insert("end", " ".join(moves))
@@ -255,26 +285,113 @@ class CubeGUI(tk.Tk):
             messagebox.showinfo("Already solved", "Cube is already solved. Scramble first if you want.")
             return
 
-        self._set_status(f"Running {algo}...")
+        if self.control:
+            return
+        solver = AC.Solvers.get(algo)
+        if solver is None:
+            messagebox.showerror("Error", "Unknown algorithm selected.")
+            return
 
-        if algo == "A*":
-            moves, runtime = AC.Astar(self.current_state)
-        elif algo == "BFS":
-            moves, runtime = AC.BFS(self.current_state)
-        elif algo == "IDS":
-            moves, runtime = AC.IDS(self.current_state)
+        # Positions solved before (or symmetric to one) come from the cache,
+        # unless stats are wanted, which needs a real search
+        start_time = time.time()
+        cached = None if self.stats_var.get() else self.cache.get(self.current_state, algo)
+        if cached is not None:
+            moves, solve_time = cached
+            self.solution_moves = moves
+            self._set_moves_output(moves, time.time() - start_time, solve_time=solve_time)
+            self._set_status(f"{algo} result from cache ({self._cache_summary()}). Click Play solution to animate.")
+            return
+
+        # Search on a worker thread; _poll_solver picks up the result
+        self.control = AC.SearchControl(stats=AC.SearchStats() if self.stats_var.get() else None)
+        self._set_busy(True)
+        self._set_status(f"Running {algo}...")
+        thread = threading.Thread(
+            target=self._run_solver,
+            args=(solver, self.current_state, self.control, algo),
+            daemon=True,
+        )
+        thread.start()
+        self.after(100, self._poll_solver)
+
+    def _run_solver(self, solver, state, control, algo):
+        # Worker thread: never touch Tk widgets here
+        try:
+            if solver is AC.PatternIDAstar:
+                # Load the distance table first (the first time ever this
+                # builds it, which takes a while); control makes it cancellable
+                self.loading_table = True
+                try:
+                    AC.table_heuristic(control=control)
+                finally:
+                    self.loading_table = False
+            moves, runtime = solver(state, control=control)
+            self.results.put((algo, state, moves, runtime, None))
+        except Exception as e:
+            self.results.put((algo, state, None, control.elapsed(), e))
+
+    def _poll_solver(self):
+        control = self.control
+        if self.loading_table:
+            text = f"Loading the distance table (built once) | Elapsed: {control.elapsed():.1f}s"
         else:
-            messagebox.showerror("Error", "Unknown algorithm selected.")
+            text = f"Nodes: {control.nodes:,} | Depth: {control.depth} | Elapsed: {control.elapsed():.1f}s"
+        self.progress_label.config(text=text)
+        try:
+            algo, state, moves, runtime, error = self.results.get_nowait()
+        except queue.Empty:
+            self.after(100, self._poll_solver)
             return
 
+        self.control = None
+        self._set_busy(False)
+        if isinstance(error, AC.SearchCancelled):
+            self._set_moves_output([], runtime, control.stats)
+            self._set_status(f"{algo} cancelled after {control.nodes:,} nodes.")
+            return
+        if error is not None:
+            self._set_moves_output([], runtime)
+            self._set_status(f"{algo} failed: {error}")
+            return
+        fallback = AC.Solvers.get(algo) is AC.PatternIDAstar and AC.table_error() is not None
+        if not fallback:
+            # Fallback answers may not be optimal, so they are not kept
+            self.cache.put(state, moves, runtime, algo)
+        self._show_solution(algo, moves, runtime, control.stats)
+        if fallback and moves is not None:
+            self._set_status(f"{algo} used the misplaced-sticker heuristic (distance table unavailable: "
+                             f"{AC.table_error()}), so the solution may not be optimal.")
+
+    def _cache_summary(self):
+        stats = self.cache.stats()
+        return f"{stats['hits']} hits / {stats['misses']} misses"
+
+    def _on_close(self):
+        self.cache.close()
+        self.destroy()
+
+    def cancel_solve(self):
+        if self.control:
+            self.control.cancel()
+            self._set_status("Cancelling...")
+
+    def _set_busy(self, busy):
+        # Lock the controls that change the cube while a search runs
+        state = "disabled" if busy else "normal"
+        for btn in (self.scramble_btn, self.reset_btn, self.solve_btn, self.play_btn, self.play_3d_btn):
+            btn.config(state=state)
+        self.cancel_btn.config(state="normal" if busy else "disabled")
+
+    def _show_solution(self, algo, moves, runtime, stats = None):
         if moves is None:
             self.solution_moves = []
-            self._set_moves_output([], runtime if runtime else 0.0)
+            self._set_moves_output([], runtime if runtime else 0.0, stats)
             self._set_status(f"{algo} did not find a solution.")
             return
 
         self.solution_moves = moves
-        self._set_moves_output(moves, runtime)
+        self._set_moves_output(moves, runtime, stats)
         self._set_status(f"{algo} finished. Click Play solution to animate.")
 
     # ----------------------------
@@ -301,7 +418,7 @@ class CubeGUI(tk.Tk):
 
         mv = self.solution_moves[self.anim_index]
         self.current_state = AC.apply_move(self.current_state, mv)
-        self._draw_cube(self.current_state)
+        self._draw_cube(self.current_state, AC.Touched[mv])
         self.anim_index += 1
         self._set_status(f"Move {self.anim_index}/{len(self.solution_moves)}: {mv}")
 
@@ -317,7 +434,7 @@ class CubeGUI(tk.Tk):
             return
         mv = self.solution_moves[self.anim_index]
         self.current_state = AC.apply_move(self.current_state, mv)
-        self._draw_cube(self.current_state)
+        self._draw_cube(self.current_state, AC.Touched[mv])
         self.anim_index += 1
         self._set_status(f"Step {self.anim_index}/{len(self.solution_moves)}: {mv}")
 
@@ -0,0 +1,130 @@
+import hashlib
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+import AlgorithmComparison as AC
+
+# Move transition tables for the encoded 2x2 state
+# A code is perm * N_TWIST + twist, so one table per coordinate is enough:
+#   perm_moves[perm, m]   -> perm after move m   (40320 x 10)
+#   twist_moves[twist, m] -> twist after move m  (2187 x 10)
+# next_state[code][m] = perm_moves[p, m] * N_TWIST + twist_moves[t, m]
+# A fused 88,179,840 x 10 table would need 3.5 GB, these need under 1 MB.
+
+TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables")
+
+
+def moves_fingerprint():
+    # Short hash of the move definitions, so stale cache files are never loaded
+    text = repr([(move, AC.Moves[move]) for move in AC.Moves])
+    return hashlib.sha1(text.encode()).hexdigest()[:10]
+
+
+def _table_paths(directory):
+    tag = moves_fingerprint()
+    return (
+        os.path.join(directory, f"perm_moves_{tag}.npy"),
+        os.path.join(directory, f"twist_moves_{tag}.npy"),
+    )
+
+
+# ----------------------------
+# Vectorized coordinates
+# ----------------------------
+def rank_perms(perms):
+    # Lexicographic ranks of an (N, 8) array of corner permutations
+    perms = np.asarray(perms)
+    rank = np.zeros(len(perms), dtype=np.int64)
+    for i in range(8):
+        smaller = (perms[:, i + 1:] < perms[:, i:i + 1]).sum(axis=1)
+        rank = rank * (8 - i) + smaller
+    return rank
+
+
+_all_perms = None
+
+
+def unrank_perms(ranks):
+    # (N,) perm ranks -> (N, 8) permutations
+    global _all_perms
+    if _all_perms is None:
+        _all_perms = np.array(list(itertools.permutations(range(8))), dtype=np.int8)
+    return _all_perms[np.asarray(ranks, dtype=np.int64)]
+
+
+def rank_twists(twists):
+    # Base-3 rank of the first 7 twists of an (N, 8) array
+    twists = np.asarray(twists, dtype=np.int64)
+    rank = np.zeros(len(twists), dtype=np.int64)
+    for i in range(7):
+        rank = rank * 3 + twists[:, i]
+    return rank
+
+
+def unrank_twists(ranks):
+    # (N,) twist ranks -> (N, 8) twists, the last one fixed by the sum rule
+    ranks = np.asarray(ranks, dtype=np.int64)
+    twists = np.empty((len(ranks), 8), dtype=np.int8)
+    for i in range(6, -1, -1):
+        ranks, twists[:, i] = np.divmod(ranks, 3)
+    twists[:, 7] = -twists[:, :7].sum(axis=1, dtype=np.int64) % 3
+    return twists
+
+
+# ----------------------------
+# Building / caching
+# ----------------------------
+def build_move_tables():
+    # Build both tables from the corner action of every move in AC.Moves
+    actions = AC.corner_moves()
+    perms = unrank_perms(np.arange(AC.N_PERM))
+    twists = unrank_twists(np.arange(AC.N_TWIST))
+
+    perm_moves = np.empty((AC.N_PERM, len(AC.Moves)), dtype=np.int32)
+    twist_moves = np.empty((AC.N_TWIST, len(AC.Moves)), dtype=np.int32)
+    for m, move in enumerate(AC.Moves):
+        src = np.array([s for s, _ in actions[move]])
+        delta = np.array([d for _, d in actions[move]])
+        perm_moves[:, m] = rank_perms(perms[:, src])
+        twist_moves[:, m] = rank_twists((twists[:, src] + delta) % 3)
+    return perm_moves, twist_moves
+
+
+def save_move_tables(perm_moves, twist_moves, directory = TABLE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    for path, table in zip(_table_paths(directory), (perm_moves, twist_moves)):
+        tmp = path + ".tmp.npy"
+        np.save(tmp, table)
+        os.replace(tmp, path)
+
+
+def load_move_tables(directory = TABLE_DIR, build = True):
+    # Memory-map the cached tables, building and saving them on first use
+    perm_path, twist_path = _table_paths(directory)
+    if not (os.path.exists(perm_path) and os.path.exists(twist_path)):
+        if not build:
+            return None
+        save_move_tables(*build_move_tables(), directory=directory)
+    return np.load(perm_path, mmap_mode="r"), np.load(twist_path, mmap_mode="r")
+
+
+def next_states(codes, move_index, tables):
+    # Vectorized next_state[codes][move] for an array of codes
+    perm_moves, twist_moves = tables
+    p, t = np.divmod(np.asarray(codes, dtype=np.int64), AC.N_TWIST)
+    return perm_moves[p, move_index].astype(np.int64) * AC.N_TWIST + twist_moves[t, move_index]
+
+
+# Main
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else TABLE_DIR
+    start_time = time.time()
+    perm_moves, twist_moves = build_move_tables()
+    save_move_tables(perm_moves, twist_moves, directory)
+    print(f"Built move tables in {time.time() - start_time:.2f}s")
+    for path in _table_paths(directory):
+        print("  ", path)
@@ -0,0 +1,398 @@
+import argparse
+import itertools
+import mmap
+import os
+import sys
+import time
+from array import array
+
+import numpy as np
+
+import cube3x3
+import move_tables
+import pattern_database
+
+# Optimal 3x3 solver: IDA* with pattern databases (Korf's method)
+#   moves, runtime = optimal_3x3.solve(state)
+#
+# Distances are in 3x3.py moves (quarter turns), and the heuristic is the
+# largest of three admissible lower bounds:
+#   corners   all 8 corners,          8! * 3^7      = 88,179,840 states
+#   edges A   edges UR UF UL UB DR DF, 12!/6! * 2^6 = 42,577,920 states
+#   edges B   edges DL DB FR FL BL BR, 12!/6! * 2^6 = 42,577,920 states
+# The corner table is the 2x2 state space seen from the 3x3's corners.
+#
+# Each table is built once by a numpy breadth-first search from the solved
+# cube, checkpointed after every depth layer so an interrupted build resumes
+# where it stopped, then stored as 4-bit packed distances (110 MB for all
+# three) and memory-mapped on first use. The move tables they are searched
+# with are cached in tables/ as well (pdb3_moves_*.npz), so a new process
+# does not rebuild them.
+#
+# Optimal solving is exponential in the solution length: positions up to
+# about 12-13 quarter turns take seconds, random 25-move scrambles are out
+# of reach in Python. Use two_phase.py for fast near-optimal solutions.
+
+CHUNK = 1 << 21
+UNSEEN = 0xFF
+N_EDGE_POSITIONS = 665280  # Ordered placements of 6 edges in 12 slots
+MAX_STORED = 0x0F          # Larger distances are stored as 15 (still a lower bound)
+
+Move_Names = list(cube3x3.Moves)
+Edge_Groups = {"edges_a": (0, 1, 2, 3, 4, 5), "edges_b": (6, 7, 8, 9, 10, 11)}
+
+
+# ----------------------------
+# Coordinates
+# ----------------------------
+def corner_code(cubie):
+    cp, co, _, _ = cubie
+    perm = int(move_tables.rank_perms(np.array([cp]))[0])
+    twist = 0
+    for t in co[:7]:
+        twist = twist * 3 + t
+    return perm * 2187 + twist
+
+
+def _rank_placements(positions):
+    # Lexicographic rank of (N, 6) ordered edge placements among 12 slots
+    positions = np.asarray(positions, dtype=np.int64)
+    rank = np.zeros(len(positions), dtype=np.int64)
+    for i in range(6):
+        smaller = (positions[:, :i] < positions[:, i:i + 1]).sum(axis=1)
+        rank = rank * (12 - i) + positions[:, i] - smaller
+    return rank
+
+
+def edge_code(cubie, group):
+    # Placement of the group's edges (in group order) and their flips
+    _, _, ep, eo = cubie
+    slots = [ep.index(edge) for edge in group]
+    flips = sum(eo[slot] << i for i, slot in enumerate(slots))
+    return int(_rank_placements([slots])[0]) * 64 + flips
+
+
+# ----------------------------
+# Move tables
+# ----------------------------
+def corner_move_tables():
+    # (perm_moves 40320 x 10, twist_moves 2187 x 10) for 3x3.py's moves
+    perms = move_tables.unrank_perms(np.arange(40320)).astype(np.int64)
+    twists = move_tables.unrank_twists(np.arange(2187)).astype(np.int64)
+    perm_moves = np.empty((40320, len(Move_Names)), dtype=np.int64)
+    twist_moves = np.empty((2187, len(Move_Names)), dtype=np.int64)
+    for m, move in enumerate(Move_Names):
+        cp, co, _, _ = cube3x3.Cubie_Moves[move]
+        perm_moves[:, m] = move_tables.rank_perms(perms[:, list(cp)])
+        twist_moves[:, m] = move_tables.rank_twists((twists[:, list(cp)] + co) % 3)
+    return perm_moves, twist_moves
+
+
+def edge_move_tables():
+    # (placement_moves, flip_masks), both 665280 x 10: a move takes
+    # placement p to placement_moves[p, m] and XORs the six flips with
+    # flip_masks[p, m]
+    placements = np.array(list(itertools.permutations(range(12), 6)), dtype=np.int64)
+    placement_moves = np.empty((N_EDGE_POSITIONS, len(Move_Names)), dtype=np.int64)
+    flip_masks = np.empty((N_EDGE_POSITIONS, len(Move_Names)), dtype=np.int64)
+    for m, move in enumerate(Move_Names):
+        _, _, ep, eo = cube3x3.Cubie_Moves[move]
+        destination = np.argsort(ep)  # Edge in slot s moves to slot destination[s]
+        moved = destination[placements]
+        placement_moves[:, m] = _rank_placements(moved)
+        flip_masks[:, m] = (np.array(eo)[moved] << np.arange(6)).sum(axis=1)
+    return placement_moves, flip_masks
+
+
+def move_tables_path(directory = move_tables.TABLE_DIR):
+    return os.path.join(directory, f"pdb3_moves_{cube3x3.moves_fingerprint()}.npz")
+
+
+def load_move_tables(directory = move_tables.TABLE_DIR, build = True):
+    # (perm_moves, twist_moves, placement_moves, flip_masks) as int32 arrays,
+    # cached in tables/ and built and saved once if missing
+    path = move_tables_path(directory)
+    names = ("perm_moves", "twist_moves", "placement_moves", "flip_masks")
+    if os.path.exists(path):
+        with np.load(path) as data:
+            return tuple(data[name] for name in names)
+    if not build:
+        return None
+    tables = tuple(table.astype(np.int32) for table in corner_move_tables() + edge_move_tables())
+    os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, **dict(zip(names, tables)))
+    os.replace(tmp, path)
+    return tables
+
+
+def _corner_children(tables):
+    perm_moves, twist_moves = tables
+
+    def children(codes, m):
+        return perm_moves[codes // 2187, m] * 2187 + twist_moves[codes % 2187, m]
+    return children
+
+
+def _edge_children(tables):
+    placement_moves, flip_masks = tables
+
+    def children(codes, m):
+        placement = codes >> 6
+        return (placement_moves[placement, m] << 6) | ((codes & 63) ^ flip_masks[placement, m])
+    return children
+
+
+# ----------------------------
+# Pattern databases
+# ----------------------------
+def _database_specs():
+    # name -> (number of states, goal code, builder of the children function)
+    specs = {"corners": (40320 * 2187, corner_code(cube3x3.Solved), lambda: _corner_children(corner_move_tables()))}
+    for name, group in Edge_Groups.items():
+        specs[name] = (N_EDGE_POSITIONS * 64, edge_code(cube3x3.Solved, group),
+                       lambda: _edge_children(edge_move_tables()))
+    return specs
+
+
+def database_path(name, directory = move_tables.TABLE_DIR):
+    return os.path.join(directory, f"pdb3_{name}_{cube3x3.moves_fingerprint()}.bin")
+
+
+def _save_checkpoint(path, dist, depth):
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, dist=dist, depth=depth)
+    os.replace(tmp, path)
+
+
+def build_database(name, directory = move_tables.TABLE_DIR, progress = None):
+    # Breadth-first search over one pattern's whole state space, resuming
+    # from tables/<name>.ckpt.npz if a previous build was interrupted
+    size, goal, make_children = _database_specs()[name]
+    children = make_children()
+    path = database_path(name, directory)
+    checkpoint = path + ".ckpt.npz"
+    os.makedirs(directory, exist_ok=True)
+    start_time = time.time()
+
+    if os.path.exists(checkpoint):
+        with np.load(checkpoint) as data:
+            dist, depth = data["dist"], int(data["depth"])
+        if progress:
+            progress(name, depth, -1, int(np.count_nonzero(dist != UNSEEN)), time.time() - start_time)
+    else:
+        dist = np.full(size, UNSEEN, dtype=np.uint8)
+        dist[goal] = 0
+        depth = 0
+    seen = int(np.count_nonzero(dist != UNSEEN))
+
+    # Same scheme as pattern_database.build_distance_table: expand small
+    # layers forwards, scan the unseen states once they are the minority
+    while True:
+        layer = np.flatnonzero(dist == depth)
+        if len(layer) == 0:
+            break
+        if progress:
+            progress(name, depth, len(layer), seen, time.time() - start_time)
+        if len(layer) < size - seen:
+            for i in range(0, len(layer), CHUNK):
+                chunk = layer[i:i + CHUNK]
+                for m in range(len(Move_Names)):
+                    child = children(chunk, m)
+                    dist[child[dist[child] == UNSEEN]] = depth + 1
+        else:
+            unseen = np.flatnonzero(dist == UNSEEN)
+            for i in range(0, len(unseen), CHUNK):
+                chunk = unseen[i:i + CHUNK]
+                found = np.zeros(len(chunk), dtype=bool)
+                for m in range(len(Move_Names)):
+                    found |= dist[children(chunk, m)] == depth
+                dist[chunk[found]] = depth + 1
+        seen += int(np.count_nonzero(dist == depth + 1))
+        depth += 1
+        _save_checkpoint(checkpoint, dist, depth)
+
+    if seen != size:
+        raise ValueError(f"{name}: only {seen} of {size} states reachable")
+    packed = pattern_database.pack_distances(np.minimum(dist, MAX_STORED))
+    tmp = path + ".tmp"
+    packed.tofile(tmp)
+    os.replace(tmp, path)
+    os.remove(checkpoint)
+    return path
+
+
+class PatternDatabase3:
+    # 4-bit distance table, memory-mapped the first time it is used
+    def __init__(self, name, directory = move_tables.TABLE_DIR, build = True, progress = None):
+        self.name = name
+        self.path = database_path(name, directory)
+        self.directory = directory
+        self.build = build
+        self.progress = progress
+        self._mm = None
+
+    def open(self):
+        if self._mm is None:
+            if not os.path.exists(self.path):
+                if not self.build:
+                    raise FileNotFoundError(self.path)
+                build_database(self.name, self.directory, self.progress)
+            with open(self.path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def distance(self, code):
+        byte = (self._mm or self.open())[code >> 1]
+        return byte >> 4 if code & 1 else byte & 0x0F
+
+
+# ----------------------------
+# Search
+# ----------------------------
+def _allowed_moves():
+    # allowed[last][repeat] = move indices that may follow `last` (-1: none)
+    # repeat=1 if last was already played twice in a row.
+    # Skips inverses, a third identical quarter turn, a second
+    # counter-clockwise quarter turn (X' X' = X X) and orders opposite faces.
+    faces = {move: face for face, pair in cube3x3.Face_Moves.items() for move in pair}
+    order = "URFDL"
+    opposite = {"U": "D", "D": "U", "R": "L", "L": "R", "F": None}
+    clockwise = {pair[0] for pair in cube3x3.Face_Moves.values()}
+    allowed = {}
+    for last in [-1] + list(range(len(Move_Names))):
+        for repeat in (0, 1):
+            moves = []
+            for m, move in enumerate(Move_Names):
+                if last >= 0:
+                    previous = Move_Names[last]
+                    if move == cube3x3.inverse_map[previous]:
+                        continue
+                    if move == previous and (repeat or move not in clockwise):
+                        continue
+                    if (opposite[faces[previous]] == faces[move]
+                            and order.index(faces[move]) < order.index(faces[previous])):
+                        continue
+                moves.append(m)
+            allowed[last, repeat] = moves
+    return allowed
+
+
+class OptimalSolver:
+    def __init__(self, directory = move_tables.TABLE_DIR, build = True, progress = None):
+        self.corners = PatternDatabase3("corners", directory, build, progress)
+        self.edges_a = PatternDatabase3("edges_a", directory, build, progress)
+        self.edges_b = PatternDatabase3("edges_b", directory, build, progress)
+        self.directory = directory
+        self.tables = None
+
+    def _load(self):
+        # Move tables as flat arrays (fast scalar indexing, 4 bytes per entry)
+        self.tables = tuple(array("i", table.tobytes()) for table in load_move_tables(self.directory))
+        for pdb in (self.corners, self.edges_a, self.edges_b):
+            pdb.open()
+        self.allowed = _allowed_moves()
+
+    def heuristic(self, corner, edge_a, edge_b):
+        return max(self.corners.distance(corner), self.edges_a.distance(edge_a), self.edges_b.distance(edge_b))
+
+    def solve(self, state, max_depth = 20, progress = None):
+        # Optimal (moves, runtime), or (None, None) beyond max_depth.
+        # progress(depth, nodes, elapsed) is called after each IDA* pass.
+        start_time = time.time()
+        if self.tables is None:
+            self._load()
+        cubie = state if len(state) == 4 else cube3x3.from_stickers(state)
+        if not cube3x3.is_solvable(cubie):
+            raise ValueError("state is not solvable")
+        corner = corner_code(cubie)
+        edge_a = edge_code(cubie, Edge_Groups["edges_a"])
+        edge_b = edge_code(cubie, Edge_Groups["edges_b"])
+
+        n = len(Move_Names)
+        perm_moves, twist_moves, placement_moves, flip_masks = self.tables
+        corners, edges_a, edges_b = self.corners.distance, self.edges_a.distance, self.edges_b.distance
+        allowed = self.allowed
+        path = []
+        nodes = 0
+
+        def search(corner, edge_a, edge_b, togo, last, repeat):
+            nonlocal nodes
+            if togo == 0:
+                return True
+            nodes += 1
+            for m in allowed[last, repeat]:
+                c = perm_moves[corner // 2187 * n + m] * 2187 + twist_moves[corner % 2187 * n + m]
+                if corners(c) >= togo:
+                    continue
+                p = (edge_a >> 6) * n + m
+                a = (placement_moves[p] << 6) | ((edge_a & 63) ^ flip_masks[p])
+                if edges_a(a) >= togo:
+                    continue
+                p = (edge_b >> 6) * n + m
+                b = (placement_moves[p] << 6) | ((edge_b & 63) ^ flip_masks[p])
+                if edges_b(b) >= togo:
+                    continue
+                path.append(m)
+                if search(c, a, b, togo - 1, m, int(m == last)):
+                    return True
+                path.pop()
+            return False
+
+        for depth in range(self.heuristic(corner, edge_a, edge_b), max_depth + 1):
+            if search(corner, edge_a, edge_b, depth, -1, 0):
+                return [Move_Names[m] for m in path], time.time() - start_time
+            if progress:
+                progress(depth, nodes, time.time() - start_time)
+        return None, None
+
+
+_solver = None
+
+
+def solve(state, max_depth = 20, progress = None):
+    global _solver
+    if _solver is None:
+        _solver = OptimalSolver(progress=print_build_progress)
+    return _solver.solve(state, max_depth, progress)
+
+
+def print_build_progress(name, depth, layer, seen, elapsed):
+    if layer < 0:
+        print(f"{name}: resuming at depth {depth} ({seen:,} seen)")
+    else:
+        print(f"{name} depth {depth:2d}: {layer:>11,} states  ({seen:,} seen, {elapsed:.1f}s)")
+
+
+def print_search_progress(depth, nodes, elapsed):
+    print(f"  no solution in {depth} moves ({nodes:,} nodes, {elapsed:.1f}s)")
+
+
+# Main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Optimal 3x3 solving with pattern databases")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build (or resume building) the pattern databases")
+    build.add_argument("--dir", default=move_tables.TABLE_DIR)
+    run = sub.add_parser("solve", help="solve random scrambles optimally")
+    run.add_argument("--scramble", type=int, default=10, help="scramble length")
+    run.add_argument("--count", type=int, default=3)
+    run.add_argument("--dir", default=move_tables.TABLE_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        for name in _database_specs():
+            if os.path.exists(database_path(name, args.dir)):
+                print(f"{name}: already built")
+                continue
+            start_time = time.time()
+            path = build_database(name, args.dir, print_build_progress)
+            print(f"{name}: done in {time.time() - start_time:.1f}s -> {path}")
+        sys.exit(0)
+
+    solver = OptimalSolver(args.dir, progress=print_build_progress)
+    for _ in range(args.count):
+        state, scramble = cube3x3.random_scramble(args.scramble)
+        print("Scramble:", " ".join(scramble))
+        moves, runtime = solver.solve(state, progress=print_search_progress)
+        print(f"Optimal: {len(moves)} moves in {runtime:.2f}s: {' '.join(moves)}")
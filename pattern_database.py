@@ -0,0 +1,186 @@
+import argparse
+import mmap
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+import AlgorithmComparison as AC
+import move_tables
+
+# Pattern database: exact distance to Goal_State for every encoded state
+# One breadth-first search from the goal covers all 88,179,840 codes.
+# Distances are stored two per byte (low nibble = even code) and the file
+# is memory-mapped, so later sessions (and other processes) share it.
+
+UNSEEN = 0xFF
+CHUNK = 1 << 21
+
+
+def table_path(directory = move_tables.TABLE_DIR):
+    return os.path.join(directory, f"distance_{move_tables.moves_fingerprint()}.bin")
+
+
+def _children(codes, tables):
+    # Yield the codes reached by each move, one array per move
+    for m in range(len(AC.Moves)):
+        yield move_tables.next_states(codes, m, tables)
+
+
+def build_distance_table(tables = None, progress = None, control = None):
+    # BFS outward from the goal over the whole state space.
+    # Small layers are expanded forwards; once most states are seen it is
+    # cheaper to scan the unseen ones and check whether any neighbour sits
+    # in the current layer (Moves is closed under inverse_map).
+    # control (an AC.SearchControl) is checked once per chunk, so a build
+    # started by a solver can be cancelled or stopped by its limits.
+    if tables is None:
+        tables = move_tables.load_move_tables()
+    dist = np.full(AC.N_STATES, UNSEEN, dtype=np.uint8)
+    dist[AC.Goal_Code] = 0
+    seen = 1
+    depth = 0
+    start_time = time.time()
+
+    while True:
+        layer = np.flatnonzero(dist == depth)
+        if len(layer) == 0:
+            break
+        if progress:
+            progress(depth, len(layer), seen, time.time() - start_time)
+
+        if len(layer) < AC.N_STATES - seen:
+            for i in range(0, len(layer), CHUNK):
+                if control:
+                    control.check()
+                for child in _children(layer[i:i + CHUNK], tables):
+                    dist[child[dist[child] == UNSEEN]] = depth + 1
+        else:
+            unseen = np.flatnonzero(dist == UNSEEN)
+            for i in range(0, len(unseen), CHUNK):
+                if control:
+                    control.check()
+                chunk = unseen[i:i + CHUNK]
+                found = np.zeros(len(chunk), dtype=bool)
+                for child in _children(chunk, tables):
+                    found |= dist[child] == depth
+                dist[chunk[found]] = depth + 1
+
+        seen += int(np.count_nonzero(dist == depth + 1))
+        depth += 1
+
+    if seen != AC.N_STATES or depth - 1 > 0x0F:
+        raise ValueError(f"distance table does not fit 4 bits ({seen} states, depth {depth - 1})")
+    return dist
+
+
+def pack_distances(dist):
+    # Two 4-bit distances per byte
+    return (dist[0::2] & 0x0F) | (dist[1::2] << 4)
+
+
+def unpack_distances(packed):
+    dist = np.empty(len(packed) * 2, dtype=np.uint8)
+    dist[0::2] = packed & 0x0F
+    dist[1::2] = packed >> 4
+    return dist
+
+
+def save_distance_table(dist, path = None):
+    path = path or table_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"  # Processes building at once don't share it
+    pack_distances(dist).tofile(tmp)
+    os.replace(tmp, path)
+    return path
+
+
+class PatternDatabase:
+    # Memory-mapped 4-bit distance table, usable as a heuristic:
+    #   AC.Astar(state, heuristic_fn=pdb)
+    #   AC.Astar(state, encoded=True, heuristic_fn=pdb)
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) * 2 != AC.N_STATES:
+            raise ValueError(f"{path} is not a full distance table")
+
+    @property
+    def cache_key(self):
+        # Identifies the table for solution_cache
+        return os.path.abspath(self.path)
+
+    def distance(self, code):
+        byte = self._mm[code >> 1]
+        return byte >> 4 if code & 1 else byte & 0x0F
+
+    def distances(self, codes):
+        # Vectorized lookup for an array of codes
+        codes = np.asarray(codes, dtype=np.int64)
+        packed = np.frombuffer(self._mm, dtype=np.uint8)[codes >> 1]
+        return np.where(codes & 1, packed >> 4, packed & 0x0F)
+
+    def __call__(self, state):
+        if not isinstance(state, int):
+            state = AC.encode_state(state)
+        return self.distance(state)
+
+
+def load_pattern_database(directory = move_tables.TABLE_DIR, build = True, progress = None, control = None):
+    # Open the saved table, running the full BFS once if it is missing
+    path = table_path(directory)
+    if not os.path.exists(path):
+        if not build:
+            return None
+        tables = move_tables.load_move_tables(directory)
+        save_distance_table(build_distance_table(tables, progress, control), path)
+    return PatternDatabase(path)
+
+
+def print_progress(depth, layer, seen, elapsed):
+    print(f"depth {depth:2d}: {layer:>10,} states  ({seen:,} seen, {elapsed:.1f}s)")
+
+
+def verify(pdb, samples = 20, max_depth = 7, seed = 0):
+    # Check the table against BFS (and Lookup) on seeded random scrambles.
+    # Returns the number of mismatches.
+    random.seed(seed)
+    failures = 0
+    for i in range(samples):
+        depth = random.randint(1, max_depth)
+        state, _ = AC.random_scramble(depth)
+        bfs_moves, bfs_time = AC.BFS(state, encoded=True)
+        lookup_moves, lookup_time = AC.Lookup(state, pdb)
+
+        ok = AC.verify_solution(state, lookup_moves) and len(bfs_moves) == pdb(state) == len(lookup_moves)
+        failures += not ok
+        print(f"[{i + 1:3d}] scramble {depth:2d}: BFS {len(bfs_moves):2d} ({bfs_time:.3f}s)  "
+              f"table {pdb(state):2d}  Lookup {len(lookup_moves):2d} ({lookup_time * 1e6:.0f}us)  "
+              f"{'ok' if ok else 'MISMATCH'}")
+    return failures
+
+
+# Main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or verify the 2x2 distance table")
+    parser.add_argument("command", choices=("build", "verify"))
+    parser.add_argument("--dir", default=move_tables.TABLE_DIR, help="table directory")
+    parser.add_argument("--samples", type=int, default=20, help="verify: scrambles to check")
+    parser.add_argument("--max-depth", type=int, default=7, help="verify: longest scramble")
+    parser.add_argument("--seed", type=int, default=0, help="verify: random seed")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start_time = time.time()
+        dist = build_distance_table(move_tables.load_move_tables(args.dir), print_progress)
+        path = save_distance_table(dist, table_path(args.dir))
+        print(f"Built distance table in {time.time() - start_time:.1f}s -> {path}")
+        print(f"God's number for these moves: {int(dist.max())}")
+    else:
+        pdb = load_pattern_database(args.dir, progress=print_progress)
+        failures = verify(pdb, args.samples, args.max_depth, args.seed)
+        print(f"{args.samples - failures}/{args.samples} scrambles agree with BFS")
+        sys.exit(1 if failures else 0)
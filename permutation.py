@@ -0,0 +1,113 @@
+import functools
+import math
+
+# Permutation algebra over sticker moves
+# A permutation p acts like the tables in Moves: new_state[i] = state[p[i]].
+#   group = MoveGroup(Moves)
+#   perm = group.sequence(["FR", "UL", "RD"])   # one permutation for all three
+#   group.apply(state, moves)                    # one tuple build instead of len(moves)
+#   group.apply_many(states, moves)              # numpy gather over a batch
+#   group.order(["FR", "UL"])                    # repeats until solved again
+#   group.solves(start, solution, goal)          # check a solver's output
+
+
+def identity(size):
+    return tuple(range(size))
+
+
+def compose(*perms):
+    # One permutation doing perms[0], then perms[1], ...
+    result = perms[0]
+    for perm in perms[1:]:
+        result = tuple(result[i] for i in perm)
+    return result
+
+
+def invert(perm):
+    inverse = [0] * len(perm)
+    for i, j in enumerate(perm):
+        inverse[j] = i
+    return tuple(inverse)
+
+
+def power(perm, k):
+    # perm applied k times (k < 0 applies the inverse), by repeated squaring
+    if k < 0:
+        perm, k = invert(perm), -k
+    result = identity(len(perm))
+    while k:
+        if k & 1:
+            result = compose(result, perm)
+        perm = compose(perm, perm)
+        k >>= 1
+    return result
+
+
+def cycles(perm):
+    # Cycles of length > 1, each starting at its smallest position
+    seen = set()
+    found = []
+    for start in range(len(perm)):
+        if start in seen or perm[start] == start:
+            continue
+        cycle = [start]
+        seen.add(start)
+        i = perm[start]
+        while i != start:
+            cycle.append(i)
+            seen.add(i)
+            i = perm[i]
+        found.append(tuple(cycle))
+    return found
+
+
+def order(perm):
+    # Smallest k > 0 with power(perm, k) == identity
+    return math.lcm(*map(len, cycles(perm)))  # lcm() of nothing is 1
+
+
+def apply(state, perm):
+    return tuple(state[i] for i in perm)
+
+
+def apply_many(states, perm):
+    # perm applied to every state in a numpy array (any shape ending in positions)
+    import numpy as np
+    return np.asarray(states)[..., np.asarray(perm, dtype=np.intp)]
+
+
+class MoveGroup:
+    # Move sequences compiled into single permutations. Compiled sequences
+    # are cached (least recently used first out), so replaying the same
+    # scramble or algorithm costs one dict lookup and one application.
+    def __init__(self, moves, cache_size = 4096):
+        self.moves = moves
+        self.size = len(next(iter(moves.values())))
+        self._compiled = functools.lru_cache(maxsize=cache_size)(self._compile)
+
+    def _compile(self, moves):
+        if not moves:
+            return identity(self.size)
+        return compose(*(self.moves[move] for move in moves))
+
+    def sequence(self, moves):
+        return self._compiled(tuple(moves))
+
+    def inverse(self, moves):
+        return invert(self.sequence(moves))
+
+    def power(self, moves, k):
+        return power(self.sequence(moves), k)
+
+    def order(self, moves):
+        return order(self.sequence(moves))
+
+    def apply(self, state, moves):
+        return apply(state, self.sequence(moves))
+
+    def apply_many(self, states, moves):
+        return apply_many(states, self.sequence(moves))
+
+    def solves(self, start, solution, goal):
+        # True if the moves take start to goal
+        return solution is not None and self.apply(start, solution) == goal
@@ -0,0 +1,135 @@
+import sys
+import time
+
+import numpy as np
+
+import AlgorithmComparison as AC
+import move_tables
+
+# Bulk scrambles and random states with numpy
+#   states, moves = bulk_scrambles(100_000, 14, seed=481)   # (N, 24) and (N, 14)
+#   states, codes = uniform_states(100_000, seed=481)       # uniform over all positions
+#   batch_solver.solve_many(as_tuples(states), "Lookup")
+#   benchmark.run_benchmark(scramble_corpus(range(1, 15), 5, seed=481))
+#
+# States are uint8 arrays of color indices into COLORS, one row per cube;
+# as_tuples turns them back into the sticker tuples the solvers take.
+# Moves are indices into AC.Moves.
+#
+# Random-move scrambles are not uniform over positions (short scrambles
+# stay close to solved, and some positions are far likelier than others).
+# uniform_states instead draws codes of the compact encoding, every one of
+# which is a reachable 2x2 position, and decodes them all at once.
+
+COLORS = tuple(dict.fromkeys(AC.Goal_State))
+MOVE_NAMES = tuple(AC.Moves)
+
+_color_index = {color: i for i, color in enumerate(COLORS)}
+Goal = np.array([_color_index[c] for c in AC.Goal_State], dtype=np.uint8)
+Perms = np.array([AC.Moves[move] for move in MOVE_NAMES], dtype=np.intp)
+
+# _Allowed[previous move][k] = the k-th move that does not undo it
+_Allowed = np.array([[m for m, move in enumerate(MOVE_NAMES) if move != AC.inverse_map[prev]]
+                     for prev in MOVE_NAMES], dtype=np.uint8)
+
+# Sticker positions of each corner slot and color indices of each corner piece
+_Slots = np.array(AC.Corner_Slots, dtype=np.intp)
+_Corner_Colors = np.array([[_color_index[c] for c in colors] for colors in AC.Corner_Colors], dtype=np.uint8)
+
+
+def random_moves(count, length, seed = None, avoid_inverse = True):
+    # (count, length) move indices; with avoid_inverse no move undoes the one before
+    rng = np.random.default_rng(seed)
+    if not length:
+        return np.empty((count, 0), dtype=np.uint8)
+    if not avoid_inverse:
+        return rng.integers(0, len(MOVE_NAMES), (count, length), dtype=np.uint8)
+    moves = np.empty((count, length), dtype=np.uint8)
+    moves[:, 0] = rng.integers(0, len(MOVE_NAMES), count)
+    picks = rng.integers(0, _Allowed.shape[1], (count, length))
+    for j in range(1, length):
+        moves[:, j] = _Allowed[moves[:, j - 1], picks[:, j]]
+    return moves
+
+
+def apply_moves(states, moves):
+    # Apply each row of moves to the matching row of states, one column at a time
+    rows = np.arange(len(states))[:, None]
+    for j in range(moves.shape[1]):
+        states = states[rows, Perms[moves[:, j]]]
+    return states
+
+
+def bulk_scrambles(count, length, seed = None, avoid_inverse = True):
+    # (states, moves) for count scrambles of `length` moves
+    moves = random_moves(count, length, seed, avoid_inverse)
+    states = apply_moves(np.broadcast_to(Goal, (count, len(Goal))), moves)
+    return np.ascontiguousarray(states), moves
+
+
+def decode_many(codes):
+    # Compact codes -> (N, 24) sticker arrays (AC.decode_state for many codes)
+    p, t = np.divmod(np.asarray(codes, dtype=np.int64), AC.N_TWIST)
+    perms = move_tables.unrank_perms(p)
+    twists = move_tables.unrank_twists(t)
+    states = np.empty((len(perms), len(Goal)), dtype=np.uint8)
+    rows = np.arange(len(perms))
+    for s in range(len(_Slots)):
+        colors = _Corner_Colors[perms[:, s]]
+        for k in range(3):
+            states[rows, _Slots[s][(twists[:, s] + k) % 3]] = colors[:, k]
+    return states
+
+
+def uniform_states(count, seed = None):
+    # (states, codes) for count positions drawn uniformly from all reachable ones
+    rng = np.random.default_rng(seed)
+    codes = rng.integers(0, AC.N_STATES, count, dtype=np.int64)
+    return decode_many(codes), codes
+
+
+def as_tuples(states):
+    # Sticker tuples (as AC uses them) for rows of color indices
+    lookup = np.array(COLORS)
+    return [tuple(row) for row in lookup[np.asarray(states)].tolist()]
+
+
+def as_move_names(moves):
+    return [[MOVE_NAMES[m] for m in row] for row in np.asarray(moves).tolist()]
+
+
+def scramble_corpus(depths, per_depth = 5, seed = None):
+    # [(depth, scramble moves)] in the format of benchmark.build_corpus
+    corpus = []
+    rng = np.random.default_rng(seed)
+    for depth in depths:
+        moves = random_moves(per_depth, depth, rng.integers(1 << 32))
+        corpus.extend((depth, scramble) for scramble in as_move_names(moves))
+    return corpus
+
+
+# Main
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    length = int(sys.argv[2]) if len(sys.argv) > 2 else 14
+
+    start_time = time.time()
+    states, moves = bulk_scrambles(count, length, seed=481)
+    print(f"{count:,} scrambles of {length} moves in {time.time() - start_time:.2f}s")
+
+    start_time = time.time()
+    uniform, codes = uniform_states(count, seed=481)
+    print(f"{count:,} uniform states in {time.time() - start_time:.2f}s")
+
+    # Spot checks against the sticker-tuple code
+    sample = range(0, count, max(1, count // 200))
+    for i, state in zip(sample, as_tuples(states[sample])):
+        assert state == AC.Group.apply(AC.Goal_State, as_move_names(moves[i:i + 1])[0])
+    for code, state in zip(codes[sample], as_tuples(uniform[sample])):
+        assert AC.encode_state(state) == code
+    print(f"Checked {len(sample)} of each against AC")
+
+    start_time = time.time()
+    for _ in range(count // 10):
+        AC.random_scramble(length)
+    print(f"AC.random_scramble for {count // 10:,}: {time.time() - start_time:.2f}s")
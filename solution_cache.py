@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import shelve
+import time
+from collections import OrderedDict, namedtuple
+
+import AlgorithmComparison as AC
+import symmetry
+
+# Solution cache in front of the solvers
+#   cache = SolutionCache(maxsize=4096, path=default_path())
+#   result = cache.solve(state, "A*")
+#   result.moves, result.runtime, result.cached
+#
+# Keys are (algorithm, solver options, state); options without a stable
+# key (see _option_key) bypass the cache. With canonical=True the state
+# is first reduced by the move-preserving symmetries, so all positions that
+# are rotations/mirrors of each other share one entry and the stored moves
+# are mapped back through the symmetry on the way out.
+#
+# The in-memory layer is an LRU of at most maxsize entries. With a path the
+# cache also writes every solution to a shelve file, which is read on a
+# memory miss, so solutions survive restarts.
+
+# runtime is the time this call took (a lookup when cached); solve_time is
+# how long the original search took
+CacheResult = namedtuple("CacheResult", ["moves", "runtime", "cached", "solve_time"])
+
+
+def default_path(directory = None):
+    # Next to the move tables, tagged with the move set like they are
+    import move_tables
+    directory = directory or move_tables.TABLE_DIR
+    return os.path.join(directory, f"solutions_{move_tables.moves_fingerprint()}")
+
+
+def _option_key(value):
+    # Stable text for one solver option, or None if it cannot be keyed.
+    # Objects name themselves with a cache_key attribute (a PatternDatabase
+    # uses its file); move tables such as pruning automata are keyed by a
+    # hash of their contents. Anything else (a plain heuristic function, an
+    # open list instance) has no identity that survives a restart.
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return repr(value)
+    cache_key = getattr(value, "cache_key", None)
+    if cache_key is not None:
+        return f"{type(value).__name__}:{cache_key}"
+    if isinstance(value, (list, tuple)):
+        try:
+            text = json.dumps(value)
+        except (TypeError, ValueError):
+            return None
+        return f"{type(value).__name__}:{hashlib.sha1(text.encode()).hexdigest()[:12]}"
+    return None
+
+
+def _options_key(kwargs):
+    # Solver options that change the answer, or None if one cannot be keyed
+    parts = []
+    for name, value in sorted(kwargs.items()):
+        if name == "control":
+            continue
+        key = _option_key(value)
+        if key is None:
+            return None
+        parts.append(f"{name}={key}")
+    return ",".join(parts)
+
+
+class SolutionCache:
+    def __init__(self, maxsize = 1024, path = None, canonical = True):
+        self.maxsize = maxsize
+        self.canonical = canonical
+        self.hits = 0
+        self.disk_hits = 0   # Included in hits
+        self.misses = 0
+        self.uncacheable = 0 # Lookups skipped: an option had no stable key
+        self._memory = OrderedDict()
+        self._disk = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._disk = shelve.open(path)
+
+    def _key(self, state, algorithm, kwargs):
+        # (shelve key, symmetry that maps state onto the stored state);
+        # the key is None when the options cannot be keyed (not cached)
+        options = _options_key(kwargs)
+        if options is None:
+            return None, None
+        sym = None
+        if self.canonical:
+            state, sym = symmetry.canonical(state)
+        # The solver's function name is part of the key, so entries made
+        # before an algorithm name was pointed at another solver are not reused
+        solver = getattr(AC.Solvers.get(algorithm), "__name__", "")
+        return f"{algorithm}:{solver}|{options}|{''.join(state)}", sym
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def get(self, state, algorithm = "A*", **kwargs):
+        # (moves, solve_time) for state, or None on a miss
+        key, sym = self._key(state, algorithm, kwargs)
+        if key is None:
+            self.uncacheable += 1
+            return None
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+        elif self._disk is not None and key in self._disk:
+            entry = self._disk[key]
+            self._remember(key, entry)
+            self.disk_hits += 1
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        moves, solve_time = entry
+        if sym is not None:
+            moves = symmetry.map_solution(moves, sym)
+        return moves, solve_time
+
+    def put(self, state, moves, solve_time, algorithm = "A*", **kwargs):
+        # Store a solution for state (failed searches are not cached)
+        if moves is None:
+            return
+        key, sym = self._key(state, algorithm, kwargs)
+        if key is None:
+            return
+        if sym is not None:
+            # Store the moves for the canonical state
+            moves = [sym["moves"][move] for move in moves]
+        entry = (list(moves), solve_time)
+        self._remember(key, entry)
+        if self._disk is not None:
+            self._disk[key] = entry
+
+    def solve(self, state, algorithm = "A*", **kwargs):
+        # Cached solve; kwargs go to the solver and are part of the key
+        start_time = time.time()
+        found = self.get(state, algorithm, **kwargs)
+        if found is not None:
+            moves, solve_time = found
+            return CacheResult(moves, time.time() - start_time, True, solve_time)
+        moves, runtime = AC.Solvers[algorithm](state, **kwargs)
+        self.put(state, moves, runtime, algorithm, **kwargs)
+        return CacheResult(moves, runtime, False, runtime)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "uncacheable": self.uncacheable,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._memory),
+        }
+
+    def clear(self):
+        self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def __len__(self):
+        return len(self._memory)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Main
+if __name__ == "__main__":
+    cache = SolutionCache()
+    states = [AC.random_scramble(7)[0] for _ in range(20)]
+    for state in states + states:
+        result = cache.solve(state, "A*")
+        label = f"cached, solved in {result.solve_time:.4f}s" if result.cached else "solved"
+        print(f"Moves = {len(result.moves):2d}, Time = {result.runtime:.4f}s ({label})")
+    print(cache.stats())
@@ -0,0 +1,129 @@
+import itertools
+
+import AlgorithmComparison as AC
+import cube_model
+
+# Whole-cube symmetries of the 2x2 state
+# A symmetry turns (or mirrors) the whole cube and renames the colours so
+# that Goal_State maps to itself. It maps a move to a move on the face the
+# symmetry sends it to (mirrors also swap clockwise / counter-clockwise).
+#
+# Positions related by a symmetry need the same number of moves only when
+# the symmetry maps Moves onto itself. There is no back-face turn, so that
+# holds for the 8 symmetries that keep the Front/Back axis in place
+# (MOVE_SYMMETRIES), not for all 24 rotations or 48 rotations + mirrors.
+
+# Sticker positions and face normals come from cube_model, which also
+# generates the move tables, so both use one geometry (for N = 2 the
+# corner positions are at +-1)
+FACE_NORMALS = cube_model.FACE_NORMALS
+FACE_ORDER = cube_model.FACE_ORDER
+
+
+def sticker_geometry():
+    # (corner position, face normal) of every sticker, matching the GUI net
+    return cube_model.sticker_geometry(2)
+
+
+def _transforms():
+    # All 48 signed axis permutations, with their determinant
+    for axes in itertools.permutations(range(3)):
+        parity = sum(1 for i in range(3) for j in range(i + 1, 3) if axes[i] > axes[j]) % 2
+        for signs in itertools.product((1, -1), repeat=3):
+            det = (-1) ** parity * signs[0] * signs[1] * signs[2]
+            yield axes, signs, det
+
+
+def _build_symmetries():
+    stickers = sticker_geometry()
+    index = {sticker: i for i, sticker in enumerate(stickers)}
+    face_color = {FACE_NORMALS[f]: AC.Goal_State[4 * k] for k, f in enumerate(FACE_ORDER)}
+    move_lookup = {perm: move for move, perm in AC.Moves.items()}
+
+    symmetries = []
+    for axes, signs, det in _transforms():
+        def turn(v):
+            return tuple(signs[i] * v[axes[i]] for i in range(3))
+
+        # Sticker i lands on sticker target[i]
+        target = [index[(turn(p), turn(n))] for p, n in stickers]
+        source = [0] * len(target)
+        for i, j in enumerate(target):
+            source[j] = i
+        colors = {face_color[n]: face_color[turn(n)] for n in FACE_NORMALS.values()}
+
+        # Conjugate of each move: target . move . source
+        moves = {}
+        for move, mapping in AC.Moves.items():
+            conjugate = tuple(target[mapping[source[k]]] for k in range(len(mapping)))
+            moves[move] = move_lookup.get(conjugate)
+
+        symmetries.append({
+            "stickers": tuple(source),   # new_state[j] = colors[state[source[j]]]
+            "colors": colors,
+            "rotation": det == 1,
+            "moves": moves if all(moves.values()) else None,
+        })
+    # Identity first, so ties in canonical() keep the original frame
+    symmetries.sort(key=lambda sym: sym["stickers"] != tuple(range(len(stickers))))
+    return symmetries
+
+
+SYMMETRIES = _build_symmetries()
+ROTATIONS = [sym for sym in SYMMETRIES if sym["rotation"]]
+MOVE_SYMMETRIES = [sym for sym in SYMMETRIES if sym["moves"]]
+
+
+def apply_symmetry(state, sym):
+    colors = sym["colors"]
+    return tuple(colors[state[i]] for i in sym["stickers"])
+
+
+def canonical(state, group = MOVE_SYMMETRIES):
+    # Smallest image of state under the group, and the symmetry that gives it
+    best, best_sym = state, group[0]
+    for sym in group:
+        image = apply_symmetry(state, sym)
+        if image < best:
+            best, best_sym = image, sym
+    return best, best_sym
+
+
+def canonical_code(code, group = MOVE_SYMMETRIES):
+    # canonical() for encoded states, keyed by the smallest code
+    state = AC.decode_state(code)
+    return min(AC.encode_state(apply_symmetry(state, sym)) for sym in group)
+
+
+def map_solution(moves, sym):
+    # A solution of apply_symmetry(state, sym) -> a solution of state
+    if sym["moves"] is None:
+        raise ValueError("symmetry does not map Moves onto itself; its solutions need other turns")
+    back = {image: move for move, image in sym["moves"].items()}
+    return [back[move] for move in moves]
+
+
+def solve_canonical(state, solver = AC.Astar, group = MOVE_SYMMETRIES, **kwargs):
+    # Solve the canonical representative, then map the moves back
+    rep, sym = canonical(state, group)
+    moves, runtime = solver(rep, **kwargs)
+    if moves is None:
+        return None, runtime
+    return map_solution(moves, sym), runtime
+
+
+def validate():
+    # Every symmetry fixes the goal and commutes with the moves it maps
+    state, _ = AC.random_scramble(20)
+    for sym in SYMMETRIES:
+        assert apply_symmetry(AC.Goal_State, sym) == AC.Goal_State
+        for move, image in (sym["moves"] or {}).items():
+            assert apply_symmetry(AC.apply_move(state, move), sym) == \
+                AC.apply_move(apply_symmetry(state, sym), image)
+    return len(SYMMETRIES), len(ROTATIONS), len(MOVE_SYMMETRIES)
+
+
+# Main
+if __name__ == "__main__":
+    total, rotations, preserving = validate()
+    print(f"{total} symmetries ({rotations} rotations), {preserving} map Moves onto itself")
@@ -0,0 +1,384 @@
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+import cube3x3
+import move_tables
+
+# Two-phase (Kociemba) solver for the 3x3 cube in 3x3.py
+#   moves, runtime = two_phase.solve(state)
+#
+# Phase 1 turns the cube into G1 = <U, D, R2, L2, F2>: no twisted corners,
+# no flipped edges and the four middle-layer edges in the middle layer.
+# Phase 2 solves it inside G1. 3x3.py has no back-face turn, but U, D, R2,
+# L2 and F2 already generate all of G1, so B2 is not needed.
+#
+# Each phase searches with IDA* over small coordinates (see below), with
+# move tables for the coordinates and two pruning tables per phase holding
+# exact distances of coordinate pairs. All tables are built with numpy on
+# first use (a few seconds) and cached in tables/. The search keeps
+# improving on the first solution until it is within `slack` face turns
+# of phase 1's lower bound (and at most max_length), or runs out of
+# time_limit seconds. Stopping at any solution of max_length or fewer
+# would return 13 quarter turns for a cube one turn from solved.
+#
+# Internally moves are face turns (face, power), power 2 being a half turn;
+# solutions are returned as 3x3.py quarter-turn moves.
+
+# Coordinate sizes
+N_TWIST = 2187      # Corner twists (3^7)
+N_FLIP = 2048       # Edge flips (2^11)
+N_SLICE = 495       # Positions of the 4 middle-layer edges (12 choose 4)
+N_CPERM = 40320     # Corner permutation (8!), phase 2
+N_UD_EDGES = 40320  # Permutation of the 8 U/D-layer edges, phase 2
+N_SLICE_SORTED = 24 # Permutation of the middle-layer edges, phase 2
+
+FACES = "URFDL"
+OPPOSITE = {0: 3, 3: 0, 1: 4, 4: 1, 2: None}
+
+# Phase 1 moves: FACES[i // 3] turned (i % 3) + 1 quarter turns
+Face_Turns = [(face, power) for face in FACES for power in (1, 2, 3)]
+# Phase 2 keeps G1: all U/D turns and half turns of R, L and F
+Phase2_Moves = [i for i, (face, power) in enumerate(Face_Turns) if face in "UD" or power == 2]
+
+
+def table_path(directory = move_tables.TABLE_DIR):
+    return os.path.join(directory, f"two_phase_{cube3x3.moves_fingerprint()}.npz")
+
+
+def face_turn_moves(face, power):
+    # One face turn as 3x3.py quarter-turn moves
+    clockwise, counter = cube3x3.Face_Moves[face]
+    return [counter] if power == 3 else [clockwise] * power
+
+
+def _cubie_turns():
+    turns = []
+    for face, power in Face_Turns:
+        turns.append(cube3x3.apply_moves(cube3x3.Solved, face_turn_moves(face, power)))
+    return turns
+
+
+Cubie_Turns = _cubie_turns()
+
+
+# ----------------------------
+# Coordinates
+# ----------------------------
+_combinations = list(itertools.combinations(range(12), 4))
+_slice_rank = np.full(1 << 12, -1, dtype=np.int64)  # Bitmask of slice edge positions -> rank
+for _rank, _combo in enumerate(_combinations):
+    _slice_rank[sum(1 << p for p in _combo)] = _rank
+_perms4 = list(itertools.permutations(range(4)))
+_perm4_rank = {perm: i for i, perm in enumerate(_perms4)}
+
+
+def _base_rank(digits, base):
+    # Rank of an (N, k) digit array, first column most significant
+    rank = np.zeros(len(digits), dtype=np.int64)
+    for i in range(digits.shape[1]):
+        rank = rank * base + digits[:, i]
+    return rank
+
+
+def _base_unrank(ranks, base, length):
+    # (N,) ranks -> (N, length) digits; the last digit makes the sum 0 mod base
+    ranks = np.asarray(ranks, dtype=np.int64)
+    digits = np.zeros((len(ranks), length), dtype=np.int64)
+    for i in range(length - 2, -1, -1):
+        digits[:, i] = ranks % base
+        ranks = ranks // base
+    digits[:, -1] = -digits[:, :-1].sum(axis=1) % base
+    return digits
+
+
+def _slice_of(ep):
+    # (N, 12) edge permutations -> slice coordinate
+    mask = (ep >= 8).astype(np.int64) << np.arange(12)
+    return _slice_rank[mask.sum(axis=1)]
+
+
+def coordinates(cubie):
+    # Phase 1 coordinates (twist, flip, slice) of one cubie state
+    cp, co, ep, eo = cubie
+    twist = int(_base_rank(np.array([co[:7]]), 3)[0])
+    flip = int(_base_rank(np.array([eo[:11]]), 2)[0])
+    return twist, flip, int(_slice_of(np.array([ep]))[0])
+
+
+def phase2_coordinates(cubie):
+    # (corner perm, U/D edge perm, slice perm) of a state in G1
+    cp, co, ep, eo = cubie
+    return (
+        int(move_tables.rank_perms(np.array([cp]))[0]),
+        int(move_tables.rank_perms(np.array([ep[:8]]))[0]),
+        _perm4_rank[tuple(e - 8 for e in ep[8:])],
+    )
+
+
+# ----------------------------
+# Table building
+# ----------------------------
+def _move_table(states, rank, turn_indices, apply):
+    # table[i, k] = rank(apply(states, turn k)) for every coordinate value i
+    table = np.empty((len(states), len(turn_indices)), dtype=np.uint16)
+    for k, t in enumerate(turn_indices):
+        table[:, k] = rank(apply(states, Cubie_Turns[t]))
+    return table
+
+
+def build_move_tables():
+    all_turns = range(len(Face_Turns))
+
+    twists = _base_unrank(np.arange(N_TWIST), 3, 8)
+    twist_move = _move_table(twists, lambda co: _base_rank(co[:, :7], 3), all_turns,
+                             lambda co, m: (co[:, list(m[0])] + m[1]) % 3)
+
+    flips = _base_unrank(np.arange(N_FLIP), 2, 12)
+    flip_move = _move_table(flips, lambda eo: _base_rank(eo[:, :11], 2), all_turns,
+                            lambda eo, m: (eo[:, list(m[2])] + m[3]) % 2)
+
+    slices = np.empty((N_SLICE, 12), dtype=np.int64)
+    for i, combo in enumerate(_combinations):
+        others = iter(range(8))
+        middle = iter(range(8, 12))
+        slices[i] = [next(middle) if p in combo else next(others) for p in range(12)]
+    slice_move = _move_table(slices, _slice_of, all_turns, lambda ep, m: ep[:, list(m[2])])
+
+    perms = move_tables.unrank_perms(np.arange(N_CPERM)).astype(np.int64)
+    cperm_move = _move_table(perms, move_tables.rank_perms, Phase2_Moves, lambda cp, m: cp[:, list(m[0])])
+
+    ud_edges = np.hstack([perms, np.tile(np.arange(8, 12), (N_UD_EDGES, 1))])
+    ud_move = _move_table(ud_edges, lambda ep: move_tables.rank_perms(ep[:, :8]), Phase2_Moves,
+                          lambda ep, m: ep[:, list(m[2])])
+
+    sorted_slices = np.array([list(range(8)) + [8 + p for p in perm] for perm in _perms4])
+    slice_sorted_move = _move_table(
+        sorted_slices, lambda ep: np.array([_perm4_rank[tuple(row)] for row in ep[:, 8:] - 8]),
+        Phase2_Moves, lambda ep, m: ep[:, list(m[2])])
+
+    return {
+        "twist_move": twist_move, "flip_move": flip_move, "slice_move": slice_move,
+        "cperm_move": cperm_move, "ud_move": ud_move, "slice_sorted_move": slice_sorted_move,
+    }
+
+
+def build_pruning_table(move_a, move_b, goal_a, goal_b):
+    # Exact distance of every (a, b) coordinate pair to (goal_a, goal_b),
+    # stored at a * len(move_b) + b, by breadth-first search
+    size_b = len(move_b)
+    move_a = move_a.astype(np.int64)
+    move_b = move_b.astype(np.int64)
+    dist = np.full(len(move_a) * size_b, 0xFF, dtype=np.uint8)
+    dist[goal_a * size_b + goal_b] = 0
+    depth = 0
+    while True:
+        layer = np.flatnonzero(dist == depth)
+        if len(layer) == 0:
+            return dist
+        a, b = layer // size_b, layer % size_b
+        for m in range(move_a.shape[1]):
+            child = move_a[a, m] * size_b + move_b[b, m]
+            dist[child[dist[child] == 0xFF]] = depth + 1
+        depth += 1
+
+
+def build_tables(progress = None):
+    start_time = time.time()
+    tables = build_move_tables()
+    if progress:
+        progress("move tables", time.time() - start_time)
+    goal_twist, goal_flip, goal_slice = coordinates(cube3x3.Solved)
+    pruning = {
+        "prune_twist": (tables["twist_move"], tables["slice_move"], goal_twist, goal_slice),
+        "prune_flip": (tables["flip_move"], tables["slice_move"], goal_flip, goal_slice),
+        "prune_cperm": (tables["cperm_move"], tables["slice_sorted_move"], 0, 0),
+        "prune_ud": (tables["ud_move"], tables["slice_sorted_move"], 0, 0),
+    }
+    for name, args in pruning.items():
+        tables[name] = build_pruning_table(*args)
+        if progress:
+            progress(name, time.time() - start_time)
+    return tables
+
+
+def load_tables(directory = move_tables.TABLE_DIR, build = True, progress = None):
+    # Load the cached tables, building and saving them once if missing
+    path = table_path(directory)
+    if os.path.exists(path):
+        with np.load(path) as data:
+            return dict(data)
+    if not build:
+        return None
+    tables = build_tables(progress)
+    os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, **tables)
+    os.replace(tmp, path)
+    return tables
+
+
+# ----------------------------
+# Search
+# ----------------------------
+def _allowed_after(moves):
+    # allowed[last face + 1] = move indices that may follow a turn of that face:
+    # never the same face twice, and opposite faces only in one order
+    allowed = []
+    for last in range(-1, len(FACES)):
+        allowed.append([
+            k for k, t in enumerate(moves)
+            if last < 0 or not (FACES.index(Face_Turns[t][0]) == last
+                                or (OPPOSITE[last] == FACES.index(Face_Turns[t][0])
+                                    and FACES.index(Face_Turns[t][0]) < last))
+        ])
+    return allowed
+
+
+class TwoPhaseSolver:
+    def __init__(self, tables):
+        self.twist_move = tables["twist_move"].tolist()
+        self.flip_move = tables["flip_move"].tolist()
+        self.slice_move = tables["slice_move"].tolist()
+        self.cperm_move = tables["cperm_move"].tolist()
+        self.ud_move = tables["ud_move"].tolist()
+        self.slice_sorted_move = tables["slice_sorted_move"].tolist()
+        # bytes indexing is the fastest scalar lookup
+        self.prune_twist = tables["prune_twist"].tobytes()
+        self.prune_flip = tables["prune_flip"].tobytes()
+        self.prune_cperm = tables["prune_cperm"].tobytes()
+        self.prune_ud = tables["prune_ud"].tobytes()
+        self.allowed1 = _allowed_after(range(len(Face_Turns)))
+        self.allowed2 = _allowed_after(Phase2_Moves)
+        self.face1 = [FACES.index(face) + 1 for face, _ in Face_Turns]
+        self.face2 = [self.face1[t] for t in Phase2_Moves]
+        self.in_phase2 = [t in Phase2_Moves for t in range(len(Face_Turns))]
+
+    def solve(self, state, max_length = 21, time_limit = 0.5, max_depth = 30, slack = 2):
+        # (moves, runtime) for a sticker state. Stops at the first solution of
+        # at most max_length face turns that is also within slack of the
+        # lower bound, or at the best one found within time_limit seconds
+        # (searching on until one exists).
+        start_time = time.time()
+        cubie = state if len(state) == 4 else cube3x3.from_stickers(state)
+        if not cube3x3.is_solvable(cubie):
+            raise ValueError("state is not solvable")
+        turns = self.solve_turns(cubie, max_length, time_limit, max_depth, slack)
+        if turns is None:
+            return None, None
+        moves = [move for t in turns for move in face_turn_moves(*Face_Turns[t])]
+        return moves, time.time() - start_time
+
+    def solve_turns(self, cubie, max_length = 21, time_limit = 0.5, max_depth = 30, slack = 2):
+        # Best phase 1 + phase 2 solution as indices into Face_Turns
+        self.cubie = cubie
+        self.deadline = time.time() + time_limit
+        self.best = None
+        self.done = False
+        self.max_depth = max_depth
+        self.path1 = []
+        self.path2 = []
+
+        twist, flip, slc = coordinates(cubie)
+        depth = max(self.prune_twist[twist * N_SLICE + slc], self.prune_flip[flip * N_SLICE + slc])
+        # Every solution needs at least `depth` face turns to reach G1
+        self.target = min(max_length, depth + slack)
+        while not self.done and depth <= max_depth and (self.best is None or depth < len(self.best)):
+            self._search1(twist, flip, slc, depth, 0)
+            depth += 1
+        return self.best
+
+    def _search1(self, twist, flip, slc, togo, last_face):
+        if togo == 0:
+            self._phase2()
+            return
+        twist_move, flip_move, slice_move = self.twist_move, self.flip_move, self.slice_move
+        prune_twist, prune_flip = self.prune_twist, self.prune_flip
+        for m in self.allowed1[last_face]:
+            # A phase 1 solution ending in a G1 move was already found one level up
+            if togo == 1 and self.in_phase2[m]:
+                continue
+            t, f, s = twist_move[twist][m], flip_move[flip][m], slice_move[slc][m]
+            if prune_twist[t * N_SLICE + s] >= togo or prune_flip[f * N_SLICE + s] >= togo:
+                continue
+            self.path1.append(m)
+            self._search1(t, f, s, togo - 1, self.face1[m])
+            self.path1.pop()
+            if self.done:
+                return
+
+    def _phase2(self):
+        if self.best is not None and time.time() > self.deadline:
+            self.done = True
+            return
+        cubie = self.cubie
+        for m in self.path1:
+            cubie = cube3x3.multiply(cubie, Cubie_Turns[m])
+        cperm, ud, slc = phase2_coordinates(cubie)
+        depth1 = len(self.path1)
+        limit = (len(self.best) - 1 if self.best else self.max_depth) - depth1
+        depth = max(self.prune_cperm[cperm * N_SLICE_SORTED + slc], self.prune_ud[ud * N_SLICE_SORTED + slc])
+        last_face = self.face1[self.path1[-1]] if self.path1 else 0
+        while depth <= limit:
+            if self._search2(cperm, ud, slc, depth, last_face):
+                # A phase 1 path that already solves the cube can't be beaten
+                # by a longer phase 1 path, so it is final
+                final = not self.path2
+                self.best = self.path1 + [Phase2_Moves[m] for m in self.path2]
+                self.path2 = []
+                self.done = final or len(self.best) <= self.target or time.time() > self.deadline
+                return
+            depth += 1
+
+    def _search2(self, cperm, ud, slc, togo, last_face):
+        if togo == 0:
+            return True
+        cperm_move, ud_move, slice_move = self.cperm_move, self.ud_move, self.slice_sorted_move
+        prune_cperm, prune_ud = self.prune_cperm, self.prune_ud
+        for m in self.allowed2[last_face]:
+            c, u, s = cperm_move[cperm][m], ud_move[ud][m], slice_move[slc][m]
+            if prune_cperm[c * N_SLICE_SORTED + s] >= togo or prune_ud[u * N_SLICE_SORTED + s] >= togo:
+                continue
+            self.path2.append(m)
+            if self._search2(c, u, s, togo - 1, self.face2[m]):
+                return True
+            self.path2.pop()
+        return False
+
+
+_solver = None
+
+
+def get_solver(directory = move_tables.TABLE_DIR):
+    global _solver
+    if _solver is None:
+        _solver = TwoPhaseSolver(load_tables(directory, progress=print_progress))
+    return _solver
+
+
+def solve(state, max_length = 21, time_limit = 0.5):
+    # Same (moves, runtime) contract as the 3x3.py / 2x2 solvers
+    return get_solver().solve(state, max_length, time_limit)
+
+
+def print_progress(name, elapsed):
+    print(f"built {name} ({elapsed:.1f}s)")
+
+
+# Main
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    solver = get_solver()
+    lengths = []
+    start_time = time.time()
+    for _ in range(count):
+        state, scramble = cube3x3.random_scramble(25)
+        moves, runtime = solver.solve(state)
+        turns = len(solver.best)
+        assert cube3x3.Model.group.solves(state, moves, cube3x3.Goal_State)
+        lengths.append(turns)
+        print(f"{turns:2d} face turns ({len(moves):2d} quarter turns) in {runtime:.3f}s")
+    print(f"Average {sum(lengths) / count:.2f} face turns, {(time.time() - start_time) / count:.3f}s per solve")
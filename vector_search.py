@@ -0,0 +1,134 @@
+import sys
+import time
+
+import numpy as np
+
+import AlgorithmComparison as AC
+import move_tables
+
+# Level-synchronous BFS over encoded states with numpy
+# Each depth layer is a sorted array of codes plus the move that reached
+# each one. All ten moves are applied to a whole layer at once through
+# the move tables, and new states are filtered against a visited bitmap
+# (one bit per code, 11 MB for the full space).
+
+CHUNK = 1 << 21
+NO_MOVE = 255
+BITS = np.array([1 << i for i in range(8)], dtype=np.uint8)
+
+
+def _test(bitmap, codes):
+    return bitmap[codes >> 3] & BITS[codes & 7] != 0
+
+
+def _mark(bitmap, codes):
+    np.bitwise_or.at(bitmap, codes >> 3, BITS[codes & 7])
+
+
+def _unique(codes):
+    # Sorted distinct codes (np.unique is much slower for int64 here)
+    codes = np.sort(codes)
+    if len(codes) == 0:
+        return codes
+    return codes[np.concatenate(([True], codes[1:] != codes[:-1]))]
+
+
+def bfs_layers(start, tables = None, control = None):
+    # Yield (codes, moves) for depth 0, 1, 2, ... until the space is exhausted.
+    # codes is sorted; moves[i] is the index (into Moves) of the last move
+    # on a shortest path to codes[i].
+    if tables is None:
+        tables = move_tables.load_move_tables()
+    visited = np.zeros((AC.N_STATES + 7) // 8, dtype=np.uint8)
+    codes = np.array([start], dtype=np.int64)
+    moves = np.array([NO_MOVE], dtype=np.uint8)
+    _mark(visited, codes)
+
+    stats = control.stats if control else None
+    depth = 0
+    while len(codes):
+        yield codes, moves
+        if control:
+            control.tick(depth, len(codes))
+            control.lower_bound = depth + 1  # The goal was not in this layer
+            control.check()
+            if stats:
+                stats.expanded += len(codes)
+                stats.max_depth = depth
+                stats.peak_frontier = max(stats.peak_frontier, len(codes))
+                stats.peak_visited += len(codes)  # The bitmap only grows
+        depth += 1
+        new_codes = []
+        new_moves = []
+        for i in range(0, len(codes), CHUNK):
+            chunk = codes[i:i + CHUNK]
+            for m in range(len(AC.Moves)):
+                clock = time.perf_counter()
+                child = move_tables.next_states(chunk, m, tables)
+                if stats:
+                    stats.move_time += time.perf_counter() - clock
+                    stats.generated += len(child)
+                    stats.duplicates += len(child)
+                child = _unique(child[~_test(visited, child)])
+                if stats:
+                    stats.duplicates -= len(child)
+                _mark(visited, child)
+                new_codes.append(child)
+                new_moves.append(np.full(len(child), m, dtype=np.uint8))
+        codes = np.concatenate(new_codes)
+        moves = np.concatenate(new_moves)
+        order = np.argsort(codes, kind="stable")
+        codes, moves = codes[order], moves[order]
+
+
+def vectorized_bfs(start, tables = None, control = None):
+    # Optimal solve by layered BFS; same (moves, runtime) contract as AC.BFS
+    start_time = time.time()
+    code = start if isinstance(start, int) else AC.encode_state(start)
+    move_names = list(AC.Moves)
+
+    layers = []
+    for codes, moves in bfs_layers(code, tables, control):
+        layers.append((codes, moves))
+        i = np.searchsorted(codes, AC.Goal_Code)
+        if i < len(codes) and codes[i] == AC.Goal_Code:
+            break
+    else:
+        return None, None
+
+    # Walk back from the goal through the parent-move arrays
+    path = []
+    code = AC.Goal_Code
+    for codes, moves in reversed(layers[1:]):
+        move = move_names[moves[np.searchsorted(codes, code)]]
+        path.append(move)
+        code = AC.apply_move_encoded(code, AC.inverse_map[move])
+    path.reverse()
+    return path, time.time() - start_time
+
+
+def enumerate_space(start = AC.Goal_Code, tables = None, progress = None):
+    # Full-space BFS; returns the number of states at each depth
+    start_time = time.time()
+    sizes = []
+    for depth, (codes, _) in enumerate(bfs_layers(start, tables)):
+        sizes.append(len(codes))
+        if progress:
+            progress(depth, len(codes), sum(sizes), time.time() - start_time)
+    return sizes
+
+
+# Main
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "enumerate":
+        import pattern_database
+        start_time = time.time()
+        sizes = enumerate_space(progress=pattern_database.print_progress)
+        print(f"Enumerated {sum(sizes):,} states in {time.time() - start_time:.1f}s")
+    else:
+        n = int(sys.argv[1]) if len(sys.argv) > 1 else 14
+        state, scramble = AC.random_scramble(n)
+        print("Scramble moves applied:", scramble)
+        moves, runtime = vectorized_bfs(state)
+        print(f"Vectorized BFS: Moves = {len(moves)}, Time = {runtime:.4f}s")
+        print("Moves to solve:", moves)